@@ -0,0 +1,234 @@
+import os
+import re
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scrape_auction import new_auction_data, set_bid_history
+
+
+# Point at a local stub server to replay recorded responses
+API_BASE = os.getenv('CNB_API_BASE', 'https://carsandbids.com/v2')
+SITE_BASE = 'https://carsandbids.com'
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/87.0.4280.88 Safari/537.36")
+
+# Same filter the bid history button sends (button[data-filter='4'])
+BID_FILTER = 4
+
+# JSON field -> quick fact key; kept as data so a renamed API field is a one-line fix
+QUICK_FACT_FIELDS = {
+    'make': 'Make',
+    'model': 'Model',
+    'mileage': 'Mileage',
+    'vin': 'VIN',
+    'title_status': 'Title Status',
+    'location': 'Location',
+    'engine': 'Engine',
+    'drivetrain': 'Drivetrain',
+    'transmission': 'Transmission',
+    'body_style': 'Body Style',
+    'exterior_color': 'Exterior Color',
+    'interior_color': 'Interior Color',
+    'seller_type': 'Seller Type',
+}
+
+# The "Ended" stat on the auction page is shown in Pacific time
+DISPLAY_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+AUCTION_STATUSES = {
+    'sold': 'Sold',
+    'reserve_not_met': 'Reserve Not Met',
+    'canceled': 'Canceled',
+    'cancelled': 'Canceled',
+}
+
+
+class ApiUnavailable(Exception):
+    """Raised when the JSON API cannot serve a request and the browser should be used."""
+
+
+def make_session(pool_size:int = 10, retries:int = 2) -> requests.Session:
+    """
+    Creates a requests.Session with a connection pool sized for the
+    number of concurrent fetches and retries on transient server errors.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT, 'Accept': 'application/json'})
+    return session
+
+
+def auction_id_from_url(url:str) -> str:
+    match = re.search(r'/auctions/([^/]+)', url)
+    if not match:
+        raise ApiUnavailable(f"No auction id in {url}")
+    return match.group(1)
+
+
+def _get_json(session, path:str, params:dict = None, timeout:int = 30):
+    try:
+        response = session.get(f"{API_BASE}{path}", params=params, timeout=timeout)
+    except requests.RequestException as e:
+        raise ApiUnavailable(str(e)) from e
+    if response.status_code != 200:
+        raise ApiUnavailable(f"{path} returned HTTP {response.status_code}")
+    try:
+        return response.json()
+    except ValueError as e:
+        raise ApiUnavailable(f"{path} did not return JSON") from e
+
+
+def _slugify(text:str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', (text or '').lower()).strip('-')
+
+
+def listing_urls_from_json(data:dict) -> list:
+    """
+    Maps a past-auctions API page onto auction URLs.
+    """
+    urls = []
+    for auction in data.get('auctions', []):
+        if auction.get('url'):
+            urls.append(auction['url'] if auction['url'].startswith('http') else SITE_BASE + auction['url'])
+        else:
+            urls.append(f"{SITE_BASE}/auctions/{auction['id']}/{_slugify(auction.get('title'))}")
+    return urls
+
+
+def fetch_auction_urls(session, max_pages:int = None, page_size:int = 50, timeout:int = 30) -> list:
+    """
+    Collects past auction URLs from the listing API, the JSON behind
+    the paginator on /past-auctions/.
+
+    Args:
+        session: Session from make_session
+        max_pages (int): Max number of pages to fetch. If None, fetch all.
+        page_size (int): Auctions per API page
+        timeout (int): Request timeout in seconds
+    Returns:
+        list: All auction URLs.
+    """
+    auction_urls = []
+    page = 0
+    while max_pages is None or page < max_pages:
+        data = _get_json(session, '/autos/auctions',
+                         {'status': 'closed', 'limit': page_size, 'offset': page * page_size}, timeout)
+        urls = listing_urls_from_json(data)
+        if not urls:
+            break
+        auction_urls.extend(urls)
+        print(f"✅ Added {len(urls)} URLs (Total: {len(auction_urls)})")
+        page += 1
+    return auction_urls
+
+
+def _format_amount(amount) -> str:
+    return f"{int(amount):,}" if amount is not None else None
+
+
+def _format_ended(value:str) -> str:
+    # ISO auction_end -> the page's "Ended" text, e.g. 'May 3, 2024 1:45pm'
+    try:
+        ended = datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(DISPLAY_TIMEZONE)
+    except (AttributeError, ValueError):
+        return value
+    return f"{ended:%b} {ended.day}, {ended.year} {ended.hour % 12 or 12}:{ended:%M}{'pm' if ended.hour >= 12 else 'am'}"
+
+
+def _format_quick_fact(field:str, value) -> str:
+    if value is None:
+        return None
+    # the page shows mileage as '48,000'
+    if field == 'mileage' and isinstance(value, (int, float)):
+        return _format_amount(value)
+    return str(value)
+
+
+def auction_data_from_json(url:str, auction:dict, comments:dict) -> dict:
+    """
+    Maps the auction detail and bid history API responses onto the
+    auction_data dict produced by scrape_auction_data.
+
+    Args:
+        url: URL of the auction page
+        auction: JSON from /autos/auctions/<id>
+        comments: JSON from /autos/auctions/<id>/comments with the bid filter
+
+    Returns:
+        Dictionary containing all scraped auction details
+    """
+    auction_data = new_auction_data(url)
+    stats = auction_data['auction_stats']
+    listing = auction.get('listing', {})
+
+    auction_data['auction_title'] = auction.get('title')
+    auction_data['auction_subtitle'] = auction.get('sub_title')
+
+    stats['reserve_status'] = 'No Reserve' if auction.get('no_reserve') else 'Reserve'
+    stats['auction_status'] = AUCTION_STATUSES.get(auction.get('status'))
+    if stats['auction_status'] != 'Canceled':
+        current_bid = auction.get('current_bid') or {}
+        stats['highest_bid_value'] = _format_amount(current_bid.get('amount'))
+        if stats['auction_status'] == 'Sold':
+            stats['buyer_username'] = current_bid.get('username')
+    stats['seller_username'] = (auction.get('seller') or {}).get('username')
+    stats['bid_count'] = auction.get('stats', {}).get('bids')
+    stats['view_count'] = auction.get('stats', {}).get('views')
+    stats['watcher_count'] = auction.get('stats', {}).get('watchers')
+    stats['auction_date'] = _format_ended(auction.get('auction_end'))
+    set_bid_history(auction_data, [
+        {
+            'bidder': (comment.get('user') or {}).get('username'),
+            'time': comment.get('created_at'),
+            'amount': str(comment['bid']['amount']),
+            'verified': (comment.get('user') or {}).get('verified', False),
+            'reputation': str((comment.get('user') or {}).get('reputation', '')),
+        }
+        for comment in comments.get('comments', [])
+        if comment.get('bid')
+    ])
+
+    for field, key in QUICK_FACT_FIELDS.items():
+        auction_data['auction_quick_facts'][key] = _format_quick_fact(field, listing.get(field))
+    auction_data['auction_quick_facts']['Seller'] = stats['seller_username']
+
+    auction_data['dougs_take'] = listing.get('dougs_take')
+    auction_data['auction_highlights']['description'] = listing.get('highlights_description')
+    auction_data['auction_highlights']['bullet_points'] = listing.get('highlights', [])
+    auction_data['known_flaws'] = listing.get('known_flaws', [])
+    auction_data['service_history']['description'] = listing.get('service_history_description')
+    auction_data['service_history']['items'] = listing.get('recent_service_history', [])
+    auction_data['included_items'] = listing.get('other_items', [])
+    auction_data['ownership_history'] = listing.get('ownership_history')
+    auction_data['seller_notes'] = listing.get('seller_notes', [])
+    auction_data['auction_videos'] = [
+        video['youtube_id'] for video in listing.get('videos', []) if video.get('youtube_id')
+    ]
+    return auction_data
+
+
+def fetch_auction_data(session, url:str, timeout:int = 30) -> dict:
+    """
+    Fetches one auction and its full bid history as JSON.
+
+    Raises:
+        ApiUnavailable: if either request fails or is not JSON
+    """
+    auction_id = auction_id_from_url(url)
+    auction = _get_json(session, f'/autos/auctions/{auction_id}', timeout=timeout)
+    comments = _get_json(session, f'/autos/auctions/{auction_id}/comments',
+                         {'filter': BID_FILTER, 'limit': 1000}, timeout)
+    return auction_data_from_json(url, auction, comments)
+
@@ -0,0 +1,222 @@
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import boto3
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+
+ARCHIVE_DIR = os.getenv('HTML_ARCHIVE_DIR', 'html_archive')
+INDEX_FILE = 'index.jsonl'
+# bytes of index.jsonl already in S3, so each upload only sends the new entries
+UPLOADED_FILE = 'index.uploaded'
+
+# S3 copy of the archive: objects/ mirrors the local objects (the keys are
+# content hashes, so uploading one twice is harmless) and index/ holds one
+# index part per upload, so runs on separate machines never overwrite each other
+S3_PREFIX = os.getenv('HTML_ARCHIVE_PREFIX', 'html_archive')
+
+
+def _compress(data:bytes):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), '.html.zst'
+    return gzip.compress(data, compresslevel=6), '.html.gz'
+
+
+def _decompress(data:bytes, filename:str) -> bytes:
+    if filename.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {filename}")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def save_page(url:str, html:str, fetched_at:str = None, archive_dir:str = ARCHIVE_DIR) -> dict:
+    """
+    Stores a fetched page in the content-addressed archive.
+
+    The compressed HTML is written once per distinct content under
+    objects/<sha[:2]>/<sha>, and every fetch is recorded in index.jsonl
+    with its URL and fetch time.
+
+    Args:
+        url: URL the page was fetched from
+        html: Rendered page HTML
+        fetched_at: ISO timestamp of the fetch (default: now, UTC)
+        archive_dir: Root folder of the archive
+
+    Returns:
+        dict: The index entry that was recorded
+    """
+    data = html.encode('utf-8')
+    sha = hashlib.sha256(data).hexdigest()
+    fetched_at = fetched_at or datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    object_dir = os.path.join(archive_dir, 'objects', sha[:2])
+    existing = [name for name in os.listdir(object_dir) if name.startswith(sha)] if os.path.isdir(object_dir) else []
+    if existing:
+        filename = existing[0]
+    else:
+        compressed, extension = _compress(data)
+        filename = sha + extension
+        os.makedirs(object_dir, exist_ok=True)
+        tmp_path = os.path.join(object_dir, filename + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, os.path.join(object_dir, filename))
+
+    entry = {
+        'url': url,
+        'fetched_at': fetched_at,
+        'sha256': sha,
+        'object': os.path.join('objects', sha[:2], filename),
+    }
+    with open(os.path.join(archive_dir, INDEX_FILE), 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+    return entry
+
+
+def load_page(entry:dict, archive_dir:str = ARCHIVE_DIR) -> str:
+    """
+    Reads back the HTML recorded by an index entry.
+    """
+    with open(os.path.join(archive_dir, entry['object']), 'rb') as f:
+        return _decompress(f.read(), entry['object']).decode('utf-8')
+
+
+def read_index(archive_dir:str = ARCHIVE_DIR, latest_only:bool = True) -> list:
+    """
+    Lists archived fetches.
+
+    Args:
+        archive_dir: Root folder of the archive
+        latest_only: Keep only the most recent fetch of each URL
+
+    Returns:
+        list: Index entries in first-fetch order
+    """
+    index_path = os.path.join(archive_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return []
+
+    with open(index_path, 'r') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    if not latest_only:
+        return entries
+
+    latest = {}
+    for entry in entries:
+        current = latest.get(entry['url'])
+        if current is None or entry['fetched_at'] >= current['fetched_at']:
+            latest[entry['url']] = entry
+    return list(latest.values())
+
+
+def _uploaded_offset(archive_dir:str) -> int:
+    try:
+        with open(os.path.join(archive_dir, UPLOADED_FILE), 'r') as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _set_uploaded_offset(archive_dir:str, offset:int):
+    with open(os.path.join(archive_dir, UPLOADED_FILE), 'w') as f:
+        f.write(str(offset))
+
+
+def upload_archive(archive_dir:str = ARCHIVE_DIR, prefix:str = S3_PREFIX, bucket:str = None,
+                   s3=None, workers:int = 16) -> int:
+    """
+    Copies the fetches recorded since the last upload to S3: their page
+    objects, then their index entries as a new part under <prefix>/index/.
+
+    Returns:
+        int: Number of index entries uploaded
+    """
+    index_path = os.path.join(archive_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return 0
+    bucket = bucket or os.getenv('AUCTIONS_BUCKET')
+    s3 = s3 or boto3.client('s3')
+
+    offset = _uploaded_offset(archive_dir)
+    with open(index_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    # a fetch still being recorded ends without a newline; leave it for next time
+    data = data[:data.rfind(b'\n') + 1]
+    if not data:
+        return 0
+    entries = [json.loads(line) for line in data.splitlines() if line.strip()]
+
+    objects = sorted({entry['object'] for entry in entries})
+    with ThreadPoolExecutor(workers) as executor:
+        list(executor.map(lambda name: s3.upload_file(os.path.join(archive_dir, name), bucket,
+                                                      f"{prefix}/{name.replace(os.sep, '/')}"), objects))
+
+    part = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl"
+    s3.put_object(Bucket=bucket, Key=f"{prefix}/index/{part}", Body=data)
+    _set_uploaded_offset(archive_dir, offset + len(data))
+    return len(entries)
+
+
+def download_archive(archive_dir:str = ARCHIVE_DIR, prefix:str = S3_PREFIX, urls:list = None,
+                     bucket:str = None, s3=None, workers:int = 16) -> int:
+    """
+    Fetches the archive index from S3 into archive_dir, with the pages of
+    the latest fetch of each URL (only urls, when given) not stored locally yet.
+
+    Returns:
+        int: Number of pages downloaded
+    """
+    bucket = bucket or os.getenv('AUCTIONS_BUCKET')
+    s3 = s3 or boto3.client('s3')
+    os.makedirs(archive_dir, exist_ok=True)
+    index_path = os.path.join(archive_dir, INDEX_FILE)
+
+    known = set()
+    local_size = 0
+    if os.path.exists(index_path):
+        local_size = os.path.getsize(index_path)
+        with open(index_path, 'rb') as f:
+            known = {line for line in f if line.strip()}
+    new_lines = []
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=f"{prefix}/index/"):
+        for item in page.get('Contents', []):
+            body = s3.get_object(Bucket=bucket, Key=item['Key'])['Body'].read()
+            for line in body.splitlines(keepends=True):
+                if line.strip() and line not in known:
+                    known.add(line)
+                    new_lines.append(line)
+    with open(index_path, 'ab') as f:
+        f.writelines(new_lines)
+    # what came from S3 need not go back (unless local fetches are still waiting ahead of it)
+    if _uploaded_offset(archive_dir) == local_size:
+        _set_uploaded_offset(archive_dir, os.path.getsize(index_path))
+
+    entries = read_index(archive_dir)
+    if urls is not None:
+        wanted = set(urls)
+        entries = [entry for entry in entries if entry['url'] in wanted]
+    missing = sorted({entry['object'] for entry in entries
+                      if not os.path.exists(os.path.join(archive_dir, entry['object']))})
+
+    def download(name):
+        path = os.path.join(archive_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        s3.download_file(bucket, f"{prefix}/{name.replace(os.sep, '/')}", path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+    with ThreadPoolExecutor(workers) as executor:
+        list(executor.map(download, missing))
+    return len(missing)
@@ -0,0 +1,58 @@
+import argparse
+import json
+import statistics
+import time
+
+import driver_setup
+
+
+# Bytes the page pulled over the network, from the browser's own timing entries
+TRANSFER_BYTES_JS = """
+const entries = performance.getEntriesByType('navigation')
+    .concat(performance.getEntriesByType('resource'));
+return entries.reduce((total, entry) => total + (entry.transferSize || 0), 0);
+"""
+
+
+def run_profile(urls:list, lean:bool) -> dict:
+    """
+    Loads each URL with one driver and measures load time, bytes
+    transferred and the driver's process-tree memory.
+    """
+    start = time.perf_counter()
+    driver = driver_setup.setup_driver(lean=lean)
+    startup = time.perf_counter() - start
+
+    load_times, transferred = [], []
+    try:
+        for url in urls:
+            start = time.perf_counter()
+            driver.get(url)
+            load_times.append(time.perf_counter() - start)
+            transferred.append(driver.execute_script(TRANSFER_BYTES_JS))
+        memory = driver_setup.driver_memory_mb(driver)
+    finally:
+        driver_setup.driver_teardown(driver)
+
+    return {
+        'profile': 'lean' if lean else 'standard',
+        'pages': len(urls),
+        'startup_s': round(startup, 2),
+        'load_p50_s': round(statistics.median(load_times), 2),
+        'load_max_s': round(max(load_times), 2),
+        'transfer_mb': round(sum(transferred) / 1024 ** 2, 2),
+        'rss_mb': round(memory, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the standard and lean browser profiles")
+    parser.add_argument("urls", help="file with one auction URL per line")
+    parser.add_argument("--limit", type=int, default=10, help="number of URLs to load per profile")
+    args = parser.parse_args()
+
+    with open(args.urls, "r") as file:
+        urls = [url.strip() for url in file if url.strip()][:args.limit]
+
+    for lean in (False, True):
+        print(json.dumps(run_profile(urls, lean)))
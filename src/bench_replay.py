@@ -0,0 +1,439 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import api_fetch
+import archive
+import driver_setup
+import metrics
+import parse_html
+import pipeline
+import scrape_auction
+import scrape_auction_urls
+
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks')
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+API_FIXTURES_DIR = os.path.join(FIXTURES_DIR, 'api')
+EXPECTED_DIR = os.path.join(FIXTURES_DIR, 'expected')
+
+LISTING_FIXTURE = 'past_auctions'
+MODES = ['parse', 'api', 'fields', 'snapshot', 'pipeline', 'listing']
+
+# metric -> True if bigger is better, used when comparing runs
+DIRECTIONS = {
+    'pages_per_sec': True,
+    'cpu_s': False,
+    'driver_cpu_s': False,
+    'driver_peak_rss_mb': False,
+    'peak_rss_mb': False,
+}
+
+
+def load_fixtures(fixtures_dir:str = FIXTURES_DIR) -> dict:
+    """
+    Reads every recorded page: fixture name (file name without .html) -> HTML.
+    """
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+        with open(path, 'r') as f:
+            fixtures[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return fixtures
+
+
+def load_expected(names:list, expected_dir:str = EXPECTED_DIR) -> dict:
+    """
+    Reads the reviewed auction_data of each fixture from expected/<name>.json
+    (stored without auction_url, which depends on where the page was served).
+    """
+    expected = {}
+    for name in names:
+        with open(os.path.join(expected_dir, name + '.json'), 'r') as f:
+            expected[name] = json.load(f)
+    return expected
+
+
+def write_expected(name:str, html:str, expected_dir:str = EXPECTED_DIR) -> str:
+    """
+    Writes the offline parse of a fixture as its expected output. Review the
+    file before committing it: it is what every mode is checked against.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        auction_data = parse_html.parse_auction_html(html, name)
+    auction_data.pop('auction_url')
+    path = os.path.join(expected_dir, name + '.json')
+    with open(path, 'w') as f:
+        json.dump(auction_data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    return path
+
+
+def load_api_fixtures(api_dir:str = API_FIXTURES_DIR) -> dict:
+    """
+    Reads every recorded API response: path under API_BASE -> JSON text.
+    api/autos/auctions/<name>.json is the response to /autos/auctions/<name>.
+    """
+    responses = {}
+    for path in sorted(glob.glob(os.path.join(api_dir, '**', '*.json'), recursive=True)):
+        with open(path, 'r') as f:
+            responses['/' + os.path.relpath(path, api_dir)[:-len('.json')].replace(os.sep, '/')] = f.read()
+    return responses
+
+
+class ReplayServer:
+    """
+    Serves recorded pages on localhost: /auctions/<name> returns fixture
+    <name>.html (query strings are ignored, so one fixture can stand in for
+    many URLs) and /past-auctions/ returns the listing fixture. Recorded API
+    responses are served under /v2, with an empty page for any listing
+    offset past the first so pagination ends.
+    """
+
+    def __init__(self, fixtures:dict, api_responses:dict = None):
+        pages = {f'/auctions/{name}': (html.encode('utf-8'), 'text/html') for name, html in fixtures.items()}
+        if LISTING_FIXTURE in fixtures:
+            pages['/past-auctions/'] = (fixtures[LISTING_FIXTURE].encode('utf-8'), 'text/html')
+        for path, text in (api_responses or {}).items():
+            pages['/v2' + path] = (text.encode('utf-8'), 'application/json')
+        empty_page = (b'{"auctions": []}', 'application/json')
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                body, content_type = pages.get(url.path, (None, None))
+                if body is not None and int(parse_qs(url.query).get('offset', ['0'])[0]) > 0:
+                    body, content_type = empty_page
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _mismatches(results:list, expected:dict) -> list:
+    # scraped output that differs from the fixture's expected output
+    names = []
+    for auction_data in results:
+        name = urlparse(auction_data['auction_url']).path.rsplit('/', 1)[-1]
+        reference = dict(expected[name], auction_url=auction_data['auction_url'])
+        if auction_data != reference:
+            names.append(name)
+    return sorted(set(names))
+
+
+def bench_parse(fixtures:dict, auction_names:list, repeat:int, expected:dict, parser:str = None) -> dict:
+    """
+    Offline parsing throughput, no browser involved.
+    """
+    results = []
+    start, cpu = time.perf_counter(), time.process_time()
+    # the missing-section notices would otherwise flood the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            results = [parse_html.parse_auction_html(fixtures[name], name, parser) for name in auction_names]
+    elapsed = time.perf_counter() - start
+    pages = repeat * len(auction_names)
+    return {
+        'parser': parse_html.select_parser(parser),
+        'pages': pages,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 1),
+        'cpu_s': round(time.process_time() - cpu, 3),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'mismatches': _mismatches(results, expected),
+    }
+
+
+def bench_api(base_url:str, auction_names:list, repeat:int, expected:dict) -> dict:
+    """
+    Fetches the replayed auctions through the JSON API, no browser involved.
+    Only auctions with recorded API responses are fetched.
+    """
+    urls = [f'{base_url}/auctions/{name}' for name in auction_names] * repeat
+    session = api_fetch.make_session(pool_size=1)
+    api_base, api_fetch.API_BASE = api_fetch.API_BASE, f'{base_url}/v2'
+    try:
+        results = []
+        start, cpu = time.perf_counter(), time.process_time()
+        for url in urls:
+            results.append(api_fetch.fetch_auction_data(session, url))
+        elapsed = time.perf_counter() - start
+    finally:
+        api_fetch.API_BASE = api_base
+        session.close()
+    return {
+        'pages': len(urls),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(len(urls) / elapsed, 1),
+        'cpu_s': round(time.process_time() - cpu, 3),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'mismatches': _mismatches(results, expected),
+    }
+
+
+def bench_driver(urls:list, expected:dict, use_snapshot:bool, lean:bool) -> dict:
+    """
+    Scrapes the replayed auction pages with one driver, end to end.
+    """
+    driver = driver_setup.setup_driver(lean=lean)
+    try:
+        # first load pays for process start-up and the promo bar, keep it out of the timing
+        scrape_auction.scrape_auction_data(driver, urls[0], use_snapshot=use_snapshot)
+        driver_cpu = driver_setup.driver_cpu_seconds(driver)
+        peak_driver_rss = driver_setup.driver_memory_mb(driver)
+
+        results = []
+        start, cpu = time.perf_counter(), time.process_time()
+        for url in urls:
+            results.append(scrape_auction.scrape_auction_data(driver, url, use_snapshot=use_snapshot))
+            peak_driver_rss = max(peak_driver_rss, driver_setup.driver_memory_mb(driver))
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        driver_cpu = driver_setup.driver_cpu_seconds(driver) - driver_cpu
+    finally:
+        driver_setup.driver_teardown(driver)
+
+    return {
+        'pages': len(urls),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(len(urls) / elapsed, 2),
+        'cpu_s': round(cpu, 3),
+        'driver_cpu_s': round(driver_cpu, 3),
+        'driver_peak_rss_mb': round(peak_driver_rss, 1),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'mismatches': _mismatches(results, expected),
+    }
+
+
+def bench_pipeline(urls:list, expected:dict, workers:int, lean:bool) -> dict:
+    """
+    Scrapes the replayed auction pages with pipeline.ScrapePipeline, unthrottled.
+    Driver CPU and memory are not broken out per driver here; see 'snapshot'.
+    """
+    results = []
+    start, cpu = time.perf_counter(), time.process_time()
+    pipeline.run_pipeline(urls, workers=workers, rate=1000, lean=lean, archive_pages=False,
+                          on_result=lambda url, auction_data, status: results.append(auction_data))
+    elapsed = time.perf_counter() - start
+    return {
+        'workers': workers,
+        'pages': len(urls),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(len(urls) / elapsed, 2),
+        'cpu_s': round(time.process_time() - cpu, 3),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'mismatches': _mismatches(results, expected),
+    }
+
+
+def bench_listing(base_url:str, lean:bool) -> dict:
+    """
+    Walks the replayed past-auctions pages with extract_auction_urls.
+    """
+    driver = driver_setup.setup_driver(lean=lean)
+    next_pages = len(metrics.step_latencies['next_page'])
+    try:
+        start, cpu = time.perf_counter(), time.process_time()
+        urls = scrape_auction_urls.extract_auction_urls(driver, start_url=f'{base_url}/past-auctions/')
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        driver_cpu = driver_setup.driver_cpu_seconds(driver)
+        driver_rss = driver_setup.driver_memory_mb(driver)
+    finally:
+        driver_setup.driver_teardown(driver)
+
+    pages = len(metrics.step_latencies['next_page']) - next_pages + 1
+    return {
+        'pages': pages,
+        'urls': len(urls),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2),
+        'cpu_s': round(cpu, 3),
+        'driver_cpu_s': round(driver_cpu, 3),
+        'driver_peak_rss_mb': round(driver_rss, 1),
+    }
+
+
+def run_benchmarks(modes:list, repeat:int = 5, workers:int = 2, lean:bool = True, parser:str = None) -> dict:
+    """
+    Runs the selected benchmark modes against the recorded fixtures.
+
+    Modes:
+        parse: offline HTML parsing (parse_html), no browser
+        api: fetch_auction_data against the recorded API responses, no browser
+        fields: scrape_auction_data, one WebDriver call per field
+        snapshot: scrape_auction_data with the single-call page snapshot
+        pipeline: ScrapePipeline with `workers` drivers
+        listing: extract_auction_urls over the paginated listing
+
+    Returns:
+        dict: mode -> measurements
+    """
+    fixtures = load_fixtures()
+    auction_names = [name for name in fixtures if name != LISTING_FIXTURE]
+    expected = load_expected(auction_names)
+
+    results = {}
+    if 'parse' in modes:
+        results['parse'] = bench_parse(fixtures, auction_names, repeat * 20, expected, parser)
+
+    server_modes = [mode for mode in modes if mode != 'parse']
+    if server_modes:
+        api_responses = load_api_fixtures()
+        with ReplayServer(fixtures, api_responses) as server:
+            urls = [f'{server.base_url}/auctions/{name}' for name in auction_names] * repeat
+            for mode in server_modes:
+                print(f"Running {mode}...")
+                if mode == 'api':
+                    api_names = [name for name in auction_names if f'/autos/auctions/{name}' in api_responses]
+                    results[mode] = bench_api(server.base_url, api_names, repeat * 20, expected)
+                elif mode in ('fields', 'snapshot'):
+                    results[mode] = bench_driver(urls, expected, mode == 'snapshot', lean)
+                elif mode == 'pipeline':
+                    results[mode] = bench_pipeline(urls, expected, workers, lean)
+                elif mode == 'listing':
+                    results[mode] = bench_listing(server.base_url, lean)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=BENCH_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(results:dict, settings:dict, results_dir:str = RESULTS_DIR) -> str:
+    """
+    Stores a run as results/<timestamp>-<commit>.json for later comparison.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    commit = git_commit()
+    now = datetime.now(timezone.utc)
+    path = os.path.join(results_dir, f"{now.strftime('%Y%m%dT%H%M%S')}-{commit}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': now.isoformat(timespec='seconds'),
+            'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+            'settings': settings,
+            'results': results,
+        }, f, indent=2)
+    return path
+
+
+def latest_results(results_dir:str = RESULTS_DIR) -> str:
+    paths = sorted(glob.glob(os.path.join(results_dir, '*.json')))
+    return paths[-1] if paths else None
+
+
+def compare_results(baseline:dict, results:dict, threshold:float = 0.1) -> list:
+    """
+    Compares a run against a stored baseline run.
+
+    Returns:
+        list: (mode, metric, baseline value, new value, relative change,
+            regressed) for every metric present in both runs. A metric has
+            regressed when it got worse by more than threshold.
+    """
+    rows = []
+    for mode, measurements in results.items():
+        before = baseline.get('results', {}).get(mode, {})
+        for metric, higher_is_better in DIRECTIONS.items():
+            if metric not in measurements or not before.get(metric):
+                continue
+            change = (measurements[metric] - before[metric]) / before[metric]
+            worse = -change if higher_is_better else change
+            rows.append((mode, metric, before[metric], measurements[metric], change, worse > threshold))
+    return rows
+
+
+def record_fixture(url:str, name:str, archive_dir:str = archive.ARCHIVE_DIR):
+    """
+    Copies the latest archived fetch of url into the fixtures as <name>.html,
+    so real pages from a scrape run can join the benchmark set, and writes
+    its expected output (see write_expected).
+    """
+    for entry in archive.read_index(archive_dir):
+        if entry['url'] == url:
+            html = archive.load_page(entry, archive_dir)
+            with open(os.path.join(FIXTURES_DIR, name + '.html'), 'w') as f:
+                f.write(html)
+            print(f"Review {write_expected(name, html)} before committing it")
+            return
+    raise KeyError(f"{url} is not in the archive at {archive_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against recorded pages on a local server")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma-separated, from {', '.join(MODES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="times each auction fixture is scraped")
+    parser.add_argument("--workers", type=int, default=2, help="drivers for the pipeline mode")
+    parser.add_argument("--standard-profile", action="store_true", help="use the standard instead of the lean profile")
+    parser.add_argument("--parser", help="offline parser backend (lxml or bs4)")
+    parser.add_argument("--save", action="store_true", help=f"store the run under {os.path.normpath(RESULTS_DIR)}")
+    parser.add_argument("--compare", help="baseline results file, or 'latest' for the newest stored run")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    parser.add_argument("--record", nargs=2, metavar=("URL", "NAME"), help="copy an archived page into the fixtures and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture(*args.record)
+        raise SystemExit(0)
+
+    # pick the baseline before --save adds this run to the results folder
+    baseline_path = latest_results() if args.compare == 'latest' else args.compare
+
+    settings = {'modes': args.modes.split(','), 'repeat': args.repeat, 'workers': args.workers,
+                'lean': not args.standard_profile, 'parser': args.parser}
+    results = run_benchmarks(settings['modes'], args.repeat, args.workers, settings['lean'], args.parser)
+    print(json.dumps(results, indent=2))
+
+    if args.save:
+        print(f"Saved {save_results(results, settings)}")
+
+    if baseline_path:
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)
+        print(f"Compared with {os.path.basename(baseline_path)} (commit {baseline.get('commit')}):")
+        regressions = 0
+        for mode, metric, before, after, change, regressed in compare_results(baseline, results, args.threshold):
+            regressions += regressed
+            print(f"  {mode:<9} {metric:<19} {before:>10} -> {after:<10} {change:+.1%}{'  REGRESSION' if regressed else ''}")
+        raise SystemExit(1 if regressions else 0)
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+
+# Reads every bid in the comment thread in one pass; used inside the page
+# snapshot and on its own by the per-element scraper.
+BID_RECORDS_JS = r"""Array.from(document.querySelectorAll('.thread li.bid'), li => {
+    const text = sel => { const el = li.querySelector(sel); return el ? el.innerText.trim() : null; };
+    const time = li.querySelector('.time');
+    return {
+        bidder: text('.user'),
+        time: time ? time.getAttribute('data-full') : null,
+        amount: text('.bid-value'),
+        verified: !!li.querySelector('.verified'),
+        reputation: text('.rep')
+    };
+})"""
+
+
+def _parse_time(value:str):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def parse_bid_records(records:list) -> list:
+    """
+    Cleans raw bid records (as returned by BID_RECORDS_JS) into
+    {'bidder', 'time', 'amount', 'verified', 'reputation'} dicts with the
+    amount as an int and the time as an ISO string. Records without an
+    amount are dropped.
+    """
+    history = []
+    for record in records or []:
+        amount = (record.get('amount') or '').replace('$', '').replace(',', '').strip()
+        if not amount.isdigit():
+            continue
+        parsed_time = _parse_time(record.get('time'))
+        reputation = record.get('reputation')
+        if reputation is not None:
+            reputation = reputation.replace('Reputation Icon', '').strip() or None
+        history.append({
+            'bidder': record.get('bidder'),
+            'time': parsed_time.isoformat() if parsed_time else record.get('time'),
+            'amount': int(amount),
+            'verified': bool(record.get('verified')),
+            'reputation': reputation,
+        })
+    return history
+
+
+def bid_metrics(history:list) -> dict:
+    """
+    Per-auction bidding metrics computed from parsed bid history.
+
+    The auction's end is taken as the time of its last bid, since late bids
+    extend the auction and the page only shows the end date as display text.
+    """
+    metrics = {
+        'unique_bidders': len({bid['bidder'] for bid in history if bid['bidder']}),
+        'first_bid_time': None,
+        'last_bid_time': None,
+        'bids_per_hour': None,
+        'final_minute_bids': None,
+        'final_hour_bids': None,
+        'max_increment': None,
+        'mean_increment': None,
+    }
+
+    timed = sorted(
+        ((_parse_time(bid['time']), bid['amount']) for bid in history if _parse_time(bid['time'])),
+        key=lambda pair: pair[0],
+    )
+    if not timed:
+        return metrics
+
+    first, last = timed[0][0], timed[-1][0]
+    hours = (last - first).total_seconds() / 3600
+    increments = [later[1] - earlier[1] for earlier, later in zip(timed, timed[1:])]
+
+    metrics.update({
+        'first_bid_time': first.isoformat(),
+        'last_bid_time': last.isoformat(),
+        'bids_per_hour': round(len(timed) / hours, 3) if hours > 0 else None,
+        'final_minute_bids': sum(1 for time, _ in timed if (last - time).total_seconds() <= 60),
+        'final_hour_bids': sum(1 for time, _ in timed if (last - time).total_seconds() <= 3600),
+        'max_increment': max(increments) if increments else None,
+        'mean_increment': round(sum(increments) / len(increments), 2) if increments else None,
+    })
+    return metrics
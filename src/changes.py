@@ -0,0 +1,209 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+
+
+# Fields that drift on every visit to an ended auction without the auction
+# itself changing; they are left out of fingerprints.
+VOLATILE_FIELDS = {'auction_stats.view_count', 'auction_stats.watcher_count'}
+# Per-bid keys that belong to the bidder's profile rather than the bid
+VOLATILE_BID_KEYS = {'reputation'}
+
+# Hex digits kept per field hash in the index; the whole-record fingerprint
+# uses the full digest, these only name what changed.
+FIELD_HASH_LENGTH = 8
+
+NEW = 'new'
+CHANGED = 'changed'
+
+
+def _normalise(value):
+    # whitespace differences in scraped text are not changes
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, dict):
+        return {key: _normalise(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalise(item) for item in value]
+    return value
+
+
+def _digest(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def normalised_fields(auction_data:dict) -> dict:
+    """
+    Flattens auction_data one level into 'section.key' fields (top-level
+    lists and scalars keep their own name), normalised and without the
+    volatile fields.
+    """
+    fields = {}
+    for key, value in auction_data.items():
+        if key == 'auction_url':
+            continue
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                fields[f'{key}.{sub_key}'] = sub_value
+        else:
+            fields[key] = value
+
+    for name in VOLATILE_FIELDS:
+        fields.pop(name, None)
+    history = fields.get('auction_stats.bid_history')
+    if history:
+        fields['auction_stats.bid_history'] = [
+            {key: value for key, value in bid.items() if key not in VOLATILE_BID_KEYS} for bid in history
+        ]
+    return _normalise(fields)
+
+
+def field_hashes(auction_data:dict) -> dict:
+    """
+    Short hash of every normalised field, keyed by field name.
+    """
+    return {name: _digest(value)[:FIELD_HASH_LENGTH] for name, value in normalised_fields(auction_data).items()}
+
+
+def fingerprint(auction_data:dict) -> str:
+    """
+    Stable hash of an auction's content: equal for two scrapes of an auction
+    that differ only in view/watch counts, bidder reputation or whitespace.
+    """
+    return _digest(normalised_fields(auction_data))
+
+
+class ChangeDetector:
+    """
+    Compares each scraped auction with its fingerprint from the previous run
+    and writes only new and changed auctions to a delta file.
+
+    The index is gzip JSON Lines: a header line listing field names, then one
+    [url, fingerprint, field hashes] line per auction, the field hashes
+    concatenated in header order. Auctions not scraped this run keep their
+    previous entry. Delta lines are
+    {'auction_url', 'change', 'changed_fields', 'fingerprint', 'auction_data'}.
+    """
+
+    def __init__(self, index_file:str, delta_file:str, resume:bool = False):
+        self.index_file = index_file
+        self.delta_file = delta_file
+        self.lock = threading.Lock()
+        self.fields = []
+        self.previous = self._read_index()
+        self.index = dict(self.previous)
+        self.counts = Counter()
+        self.changed_fields = Counter()
+
+        if resume and os.path.exists(delta_file):
+            self._drop_partial_line()
+            # auctions already compared before the interruption
+            for entry in self.iter_delta():
+                hashes = field_hashes(entry['auction_data'])
+                self.index[entry['auction_url']] = (entry['fingerprint'], self._pack(hashes))
+                self._count(entry)
+        elif os.path.exists(delta_file):
+            os.remove(delta_file)
+        self.delta = open(delta_file, 'a')
+
+    def _drop_partial_line(self):
+        # a crash mid-write leaves an unterminated last line; cut it off
+        with open(self.delta_file, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def _read_index(self) -> dict:
+        if not os.path.exists(self.index_file):
+            return {}
+        index = {}
+        with gzip.open(self.index_file, 'rt') as f:
+            self.fields = json.loads(f.readline())['fields']
+            for line in f:
+                url, record_fingerprint, packed = json.loads(line)
+                index[url] = (record_fingerprint, packed)
+        return index
+
+    def _pack(self, hashes:dict) -> str:
+        for name in hashes:
+            if name not in self.fields:
+                self.fields.append(name)
+        missing = '-' * FIELD_HASH_LENGTH
+        return ''.join(hashes.get(name, missing) for name in self.fields)
+
+    def _unpack(self, packed:str) -> dict:
+        width = FIELD_HASH_LENGTH
+        return {name: packed[i * width:(i + 1) * width] for i, name in enumerate(self.fields)
+                if packed[i * width:(i + 1) * width] not in ('', '-' * width)}
+
+    def _count(self, entry:dict):
+        self.counts[entry['change']] += 1
+        self.changed_fields.update(entry['changed_fields'])
+
+    def check(self, url:str, auction_data:dict) -> dict:
+        """
+        Records auction_data's fingerprint. Safe to call from several threads.
+
+        Returns:
+            dict: {'auction_url', 'change', 'changed_fields'} if the auction
+                is new or changed since the previous run, else None
+        """
+        hashes = field_hashes(auction_data)
+        record_fingerprint = fingerprint(auction_data)
+        with self.lock:
+            prior = self.previous.get(url)
+            self.index[url] = (record_fingerprint, self._pack(hashes))
+            if prior is not None and prior[0] == record_fingerprint:
+                self.counts['unchanged'] += 1
+                return None
+
+            if prior is None:
+                change, changed_fields = NEW, []
+            else:
+                prior_hashes = self._unpack(prior[1])
+                changed_fields = sorted(name for name in set(hashes) | set(prior_hashes)
+                                        if hashes.get(name) != prior_hashes.get(name))
+                change = CHANGED
+            entry = {'auction_url': url, 'change': change, 'changed_fields': changed_fields}
+            self.delta.write(json.dumps({**entry, 'fingerprint': record_fingerprint,
+                                         'auction_data': auction_data}) + '\n')
+            self.delta.flush()
+            self._count(entry)
+            return entry
+
+    def iter_delta(self):
+        """
+        Yields every delta line written so far, including earlier runs when resuming.
+        """
+        with open(self.delta_file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def summary(self) -> dict:
+        """
+        Counts of new, changed and unchanged auctions and how often each
+        field changed.
+        """
+        return {
+            'new': self.counts[NEW],
+            'changed': self.counts[CHANGED],
+            'unchanged': self.counts['unchanged'],
+            'changed_fields': dict(self.changed_fields.most_common()),
+        }
+
+    def close(self):
+        """
+        Closes the delta file and writes the updated index.
+        """
+        self.delta.close()
+        tmp_path = self.index_file + '.tmp'
+        with gzip.open(tmp_path, 'wt') as f:
+            f.write(json.dumps({'fields': self.fields}) + '\n')
+            for url, (record_fingerprint, packed) in self.index.items():
+                f.write(json.dumps([url, record_fingerprint, packed]) + '\n')
+        os.replace(tmp_path, self.index_file)
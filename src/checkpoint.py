@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+
+
+class CheckpointedWriter:
+    """
+    Streams auction_data dicts to an append-only JSON Lines file and records
+    each finished URL in a checkpoint file next to it, so an interrupted run
+    can be resumed without redoing or losing work.
+
+    A result line is always flushed before its URL is checkpointed. A crash
+    between the two can leave one duplicate line after resume; readers
+    should keep the last line per auction_url.
+    """
+
+    def __init__(self, output_file:str, resume:bool = False):
+        self.output_file = output_file
+        self.checkpoint_file = output_file + '.done'
+        self.lock = threading.Lock()
+        self.count = 0
+
+        if resume:
+            self.completed = self._read_checkpoint()
+            self._drop_partial_line()
+        else:
+            self.completed = set()
+            for path in (self.output_file, self.checkpoint_file):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self.output = open(self.output_file, 'a')
+        self.checkpoint = open(self.checkpoint_file, 'a')
+
+    def _read_checkpoint(self) -> set:
+        if not os.path.exists(self.checkpoint_file):
+            return set()
+        with open(self.checkpoint_file, 'r') as f:
+            return set(line.strip() for line in f if line.strip())
+
+    def _drop_partial_line(self):
+        # a crash mid-write leaves an unterminated last line; cut it off
+        if not os.path.exists(self.output_file):
+            return
+        with open(self.output_file, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def pending(self, urls:list) -> list:
+        """
+        Filters out URLs that a previous run already completed.
+        """
+        return [url for url in urls if url not in self.completed]
+
+    def iter_results(self):
+        """
+        Yields every result written so far, including earlier runs when resuming.
+        """
+        self.output.flush()
+        with open(self.output_file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def write(self, url:str, auction_data:dict):
+        """
+        Appends one result and checkpoints its URL. Safe to call from
+        several worker threads.
+        """
+        line = json.dumps(auction_data)
+        with self.lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+            os.fsync(self.output.fileno())
+            self.checkpoint.write(url + '\n')
+            self.checkpoint.flush()
+            self.completed.add(url)
+            self.count += 1
+
+    def close(self):
+        self.output.close()
+        self.checkpoint.close()
@@ -7,10 +7,140 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import time
+import os
+import re
+import glob
+import json
+import shutil
+import fcntl
+import threading
+import subprocess
+import tempfile
+from collections import Counter
 
+from metrics import record_step
 
+# sessions whose promo bar has already been handled; it stays dismissed afterwards
+_promo_bar_checked = set()
+# profile directories whose promo bar was handled by an earlier session, and each session's profile
+_warm_profiles = set()
+_session_profiles = {}
 
-def setup_driver():
+
+# Resources we never read. Video IDs come from the src attribute of
+# img.video-preview, which is still in the DOM when the image itself is blocked.
+BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m3u8",
+    "*youtube.com/embed/*", "*ytimg.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*connect.facebook.*", "*hotjar.com*", "*segment.io*",
+    "*segment.com*", "*clarity.ms*", "*intercom.io*", "*sentry.io*",
+]
+
+
+DRIVER_CACHE_DIR = os.getenv(
+    "CHROMEDRIVER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "carsnbids-scraper"))
+CHROME_BINARIES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+
+_driver_path = None
+_driver_path_resolved = False
+_driver_path_lock = threading.Lock()
+
+
+def chrome_version() -> str:
+    """
+    Installed Chrome version (e.g. '137.0.7151.68'), or None if not found.
+    """
+    binaries = [os.getenv("CHROME_BINARY")] if os.getenv("CHROME_BINARY") else CHROME_BINARIES
+    for binary in binaries:
+        path = shutil.which(binary) or (binary if os.path.isfile(binary) else None)
+        if not path:
+            continue
+        try:
+            output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _selenium_manager_driver(version:str):
+    # chromedriver binaries Selenium Manager already downloaded, matching major version
+    major = version.split(".")[0] if version else "*"
+    pattern = os.path.join(os.path.expanduser("~"), ".cache", "selenium", "chromedriver", "*", f"{major}.*", "chromedriver")
+    candidates = sorted(glob.glob(pattern))
+    return candidates[-1] if candidates else None
+
+
+def resolve_driver_path() -> str:
+    """
+    Finds the chromedriver binary once per Chrome version.
+
+    Order: CHROMEDRIVER_PATH (pinned), this process's earlier answer, the
+    on-disk cache keyed by Chrome version, Selenium Manager's cache, and only
+    then a webdriver-manager download. The disk cache is shared by every
+    process through a file lock, so a pool of drivers resolves it once.
+
+    Returns:
+        Path to chromedriver, or None to let Selenium Manager resolve it
+    """
+    global _driver_path, _driver_path_resolved
+    pinned = os.getenv("CHROMEDRIVER_PATH")
+    if pinned:
+        return pinned
+
+    with _driver_path_lock:
+        if _driver_path_resolved and (_driver_path is None or os.path.exists(_driver_path)):
+            return _driver_path
+
+        with record_step("driver_resolve"):
+            version = chrome_version() or "unknown"
+            os.makedirs(DRIVER_CACHE_DIR, exist_ok=True)
+            cache_file = os.path.join(DRIVER_CACHE_DIR, "chromedriver.json")
+
+            with open(os.path.join(DRIVER_CACHE_DIR, "chromedriver.lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+                cache = {}
+                if os.path.exists(cache_file):
+                    with open(cache_file, "r") as f:
+                        cache = json.load(f)
+
+                path = cache.get(version)
+                if not path or not os.path.exists(path):
+                    path = _selenium_manager_driver(version if version != "unknown" else None)
+                if not path:
+                    try:
+                        path = ChromeDriverManager().install()
+                    except Exception as e:
+                        print(f"⚠️ Could not download chromedriver, leaving it to Selenium Manager: {e}")
+                        path = None
+
+                if path:
+                    cache[version] = path
+                    with open(cache_file, "w") as f:
+                        json.dump(cache, f, indent=2)
+
+        _driver_path = path
+        _driver_path_resolved = True
+        return path
+
+
+def setup_driver(lean:bool = False, profile_dir:str = None):
+    """
+    Launches headless Chrome.
+
+    Args:
+        lean: Block images, media, fonts and trackers and return from
+            driver.get at DOMContentLoaded instead of the full load event
+        profile_dir: Chrome user data directory to launch with. Reusing one
+            keeps the HTTP cache and cookies of the previous browser, so a
+            relaunched driver starts warm. Only one browser may use it at a time.
+    """
     options = Options()
     options.add_argument("--headless=new") 
     options.add_argument("--disable-gpu")
@@ -20,27 +150,213 @@ def setup_driver():
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                          "AppleWebKit/537.36 (KHTML, like Gecko) "
                          "Chrome/87.0.4280.88 Safari/537.36")
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={profile_dir}")
 
-    driver = webdriver.Chrome(
-        service=ChromeService(ChromeDriverManager().install()),
-        options=options
-        )
+    if lean:
+        options.page_load_strategy = "eager"
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--mute-audio")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+
+    driver_path = resolve_driver_path()
+    with record_step("driver_launch"):
+        driver = webdriver.Chrome(
+            service=ChromeService(driver_path) if driver_path else ChromeService(),
+            options=options
+            )
+
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    if profile_dir:
+        _session_profiles[driver.session_id] = profile_dir
     return driver
 
 
-def close_promo_bar(driver, timeout=10):
+def _proc_tree_stats(root_pid:int) -> list:
+    # Linux fallback without psutil: /proc stat fields of root_pid and all its descendants
+    children = {}
+    stats = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+            stats[int(entry)] = fields
+        except (OSError, IndexError, ValueError):
+            continue
+
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid in stats:
+            tree.append(stats[pid])
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def driver_memory_mb(driver) -> float:
+    """
+    Resident memory of chromedriver and every Chrome process it started, in MB.
+    """
+    root_pid = driver.service.process.pid
+    try:
+        import psutil
+        root = psutil.Process(root_pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(process.memory_info().rss for process in processes) / 1024 ** 2
+    except ImportError:
+        pass
+
+    rss_pages = sum(int(fields[21]) for fields in _proc_tree_stats(root_pid))
+    return rss_pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def driver_cpu_seconds(driver) -> float:
+    """
+    User + system CPU time used so far by chromedriver and the Chrome
+    processes it started that are still running.
+    """
+    root_pid = driver.service.process.pid
     try:
-        # Wait for the close button to be present AND clickable
-        close_button = WebDriverWait(driver, timeout).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, ".promo-bar.new-seller .rb.close.dismiss"))
-        )
-        close_button.click()
-        print("Promo bar closed successfully.")
-    except TimeoutException:
-        print("Promo bar close button not found or not clickable within timeout.")
-    except Exception as e:
-        print(f"Error closing promo bar: {e}")
+        import psutil
+        root = psutil.Process(root_pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(sum(process.cpu_times()[:2]) for process in processes)
+    except ImportError:
+        pass
+
+    ticks = sum(int(fields[11]) + int(fields[12]) for fields in _proc_tree_stats(root_pid))
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+def clear_browser_state(driver):
+    """
+    Frees what a long-lived browser accumulates without relaunching it:
+    leaves the current page and drops the HTTP cache. Cookies are kept.
+    """
+    with record_step("driver_clear"):
+        driver.get("about:blank")
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+
+
+class ManagedDriver:
+    """
+    A headless browser that keeps itself within bounds over a long run.
+
+    Every check_every pages the memory of the whole Chrome process tree is
+    measured. Over max_memory_mb the browser's cache is cleared first; if that
+    does not bring it back under the limit, or after max_pages pages, the
+    browser is relaunched. Relaunches reuse the same profile directory, so the
+    new browser starts with a warm cache and cookies.
+    """
+
+    def __init__(self, lean:bool = False, max_pages:int = 1000, max_memory_mb:float = 1500,
+                 check_every:int = 25, warm_profile:bool = True):
+        self.lean = lean
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.check_every = check_every
+        self.profile_dir = tempfile.mkdtemp(prefix="carsnbids-profile-") if warm_profile else None
+        self.driver = None
+        self.pages = 0
+        self.peak_memory_mb = 0.0
+        self.recycles = Counter()   # reason -> count: 'memory', 'pages', 'cleared'
+
+    def get(self):
+        """
+        The running driver, launching one if needed.
+        """
+        if self.driver is None:
+            self.driver = setup_driver(lean=self.lean, profile_dir=self.profile_dir)
+            self.pages = 0
+        return self.driver
+
+    def discard(self):
+        """
+        Drops the current driver (e.g. after it crashed); the next get() relaunches.
+        """
+        try:
+            if self.driver is not None:
+                driver_teardown(self.driver)
+        except Exception:
+            pass
+        self.driver = None
+
+    def _memory_mb(self) -> float:
+        try:
+            memory = driver_memory_mb(self.driver)
+        except Exception:
+            return 0.0
+        self.peak_memory_mb = max(self.peak_memory_mb, memory)
+        return memory
+
+    def page_done(self):
+        """
+        Call after each page; recycles the browser when it is over a limit.
+        """
+        self.pages += 1
+        if self.pages >= self.max_pages:
+            self.recycles['pages'] += 1
+            self.discard()
+            return
+        if not self.max_memory_mb or self.pages % self.check_every:
+            return
+
+        memory = self._memory_mb()
+        if memory <= self.max_memory_mb:
+            return
+        try:
+            clear_browser_state(self.driver)
+            self.recycles['cleared'] += 1
+            memory = self._memory_mb()
+        except Exception:
+            pass
+        if memory > self.max_memory_mb:
+            print(f"Browser at {memory:.0f} MB after {self.pages} pages, relaunching")
+            self.recycles['memory'] += 1
+            self.discard()
+
+    def close(self):
+        self.discard()
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+def close_promo_bar(driver, timeout=10):
+    # Only the first page of a session can show the promo bar, so later calls return at once.
+    # A relaunched browser on a profile that already dealt with it skips the wait too.
+    if driver.session_id in _promo_bar_checked:
+        return
+    _promo_bar_checked.add(driver.session_id)
+    profile_dir = _session_profiles.get(driver.session_id)
+    if profile_dir in _warm_profiles:
+        return
+    if profile_dir:
+        _warm_profiles.add(profile_dir)
+
+    with record_step('promo_bar'):
+        try:
+            # Wait for the close button to be present AND clickable
+            close_button = WebDriverWait(driver, timeout).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, ".promo-bar.new-seller .rb.close.dismiss"))
+            )
+            close_button.click()
+            print("Promo bar closed successfully.")
+        except TimeoutException:
+            print("Promo bar close button not found or not clickable within timeout.")
+        except Exception as e:
+            print(f"Error closing promo bar: {e}")
 
 
 def driver_teardown(driver):
+    _promo_bar_checked.discard(driver.session_id)
+    _session_profiles.pop(driver.session_id, None)
     driver.quit()
\ No newline at end of file
@@ -0,0 +1,147 @@
+import random
+import re
+import threading
+from collections import deque
+
+
+# Outcome of one auction fetch
+OK = 'ok'
+TIMEOUT = 'timeout'                  # the page never rendered in time
+BLOCKED = 'blocked'                  # a block, challenge or rate-limit page came back
+MISSING_TITLE = 'missing_title'      # a real page without an auction on it
+SELECTOR_DRIFT = 'selector_drift'    # an auction page whose always-present fields did not parse
+PARSE_ERROR = 'parse_error'          # the parser raised, or its worker process died
+
+# Failure -> how many times it is worth fetching again. Drift comes from our
+# selectors, not the site, so refetching the same page cannot fix it.
+RETRY_LIMITS = {
+    TIMEOUT: 2,
+    BLOCKED: 3,
+    MISSING_TITLE: 1,
+    PARSE_ERROR: 1,
+}
+
+# Failures a later run should pick up again (see UrlStore.failed); they are
+# neither checkpointed nor uploaded
+TRANSIENT = {TIMEOUT, BLOCKED, PARSE_ERROR}
+
+# Lower-cased page titles of block, challenge and rate-limit pages
+BLOCK_TITLE_MARKERS = [
+    'access denied',
+    'attention required! | cloudflare',
+    'just a moment...',
+    'too many requests',
+    'request blocked',
+    'error 1020',
+    '403 forbidden',
+    'captcha',
+]
+
+# Lower-cased markers only challenge pages carry, wherever they appear in the head
+CHALLENGE_MARKERS = [
+    'cf-challenge',
+    'cf-browser-verification',
+    '/cdn-cgi/challenge-platform/',
+]
+
+_TITLE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+
+def looks_blocked(html:str) -> bool:
+    """
+    True if the page looks like a block, challenge or rate-limit page
+    rather than carsandbids content: its <title> names one, or the head of
+    the document carries a challenge marker. Scripts real pages load too,
+    such as reCAPTCHA, do not count.
+    """
+    if not html:
+        return False
+    head = html[:4096].lower()
+    if 'auction-title' in head:
+        return False
+    match = _TITLE.search(head)
+    title = ' '.join(match.group(1).split()) if match else ''
+    if any(marker in title for marker in BLOCK_TITLE_MARKERS):
+        return True
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+def classify(auction_data:dict, html:str = None, timed_out:bool = False) -> str:
+    """
+    Classifies one fetched auction.
+
+    Args:
+        auction_data: The parsed result
+        html: The page as fetched, when there was one
+        timed_out: The page did not render before the fetch timed out
+
+    Returns:
+        str: OK, TIMEOUT, BLOCKED, MISSING_TITLE or SELECTOR_DRIFT (PARSE_ERROR
+            is set by the pipeline when parsing fails)
+    """
+    # a page that parsed into an auction is not a block page, whatever scripts it loads
+    if not auction_data.get('auction_title'):
+        if looks_blocked(html):
+            return BLOCKED
+        return TIMEOUT if timed_out else MISSING_TITLE
+
+    # every auction page has these, whatever the car or outcome
+    stats = auction_data.get('auction_stats', {})
+    quick_facts = auction_data.get('auction_quick_facts', {})
+    if (stats.get('reserve_status') is None or stats.get('seller_username') is None
+            or stats.get('auction_date') is None or quick_facts.get('Make') is None):
+        return SELECTOR_DRIFT
+    return OK
+
+
+def backoff_delay(attempt:int, base:float = 5, cap:float = 300) -> float:
+    """
+    Seconds to wait before retry number `attempt` (1 for the first retry):
+    exponential backoff with full jitter, so retries from many workers
+    spread out instead of arriving together.
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Watches the share of blocked fetches over the last `window` fetches and
+    slows the shared rate limiter down when it climbs.
+
+    Each time the block rate is above trip_rate the limiter's rate is cut by
+    slow_factor (down to min_rate) and the window starts over, so one burst
+    of blocks only trips it once. After a full window under trip_rate / 2
+    the rate steps back up by the same factor, up to the starting rate.
+    """
+
+    def __init__(self, limiter, window:int = 20, trip_rate:float = 0.2,
+                 slow_factor:float = 0.5, min_rate:float = 0.02):
+        self.limiter = limiter
+        self.base_rate = limiter.rate
+        self.window = window
+        self.trip_rate = trip_rate
+        self.slow_factor = slow_factor
+        self.min_rate = min_rate
+        self.outcomes = deque(maxlen=window)
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def record(self, status:str):
+        with self.lock:
+            self.outcomes.append(status == BLOCKED)
+            if len(self.outcomes) < self.window:
+                return
+            block_rate = sum(self.outcomes) / len(self.outcomes)
+
+            rate = self.limiter.rate
+            if block_rate > self.trip_rate and rate > self.min_rate:
+                rate = max(self.min_rate, rate * self.slow_factor)
+                self.trips += 1
+                print(f"⚠️ {block_rate:.0%} of recent fetches blocked, slowing to {rate:.3f} req/s")
+            elif block_rate <= self.trip_rate / 2 and rate < self.base_rate:
+                rate = min(self.base_rate, rate / self.slow_factor)
+                print(f"Block rate down to {block_rate:.0%}, speeding back up to {rate:.3f} req/s")
+            else:
+                return
+            self.limiter.set_rate(rate)
+            self.outcomes.clear()
@@ -1,29 +1,252 @@
+import argparse
+import asyncio
+import contextlib
+import os
 import time
-import driver_setup
-import scrape_auction
+import archive
+import changes
+import checkpoint
+import failures
+import pipeline
+import schedule
+import sharding
 import upload
-import notify
+import metrics
+import url_store
+import parquet_output
 
 
-with open("src/rescrape_urls_part_5.txt", "r") as file:
-    urls = [url.strip() for url in file.readlines()]
+parser = argparse.ArgumentParser(description="Scrape auction URLs and upload the results to S3")
+parser.add_argument("--urls", default="src/rescrape_urls_part_5.txt", help="file with one auction URL per line")
+parser.add_argument("--output", default="rescraped_results.jsonl", help="JSON Lines file results are streamed to")
+parser.add_argument("--resume", action="store_true", help="skip URLs already completed in --output")
+parser.add_argument("--parquet", help="also write this run's results to a Parquet file (needs pyarrow)")
+parser.add_argument("--url-store", help="SQLite URL index to record scrape status in "
+                                       "(fetched from S3 if missing, uploaded after the run)")
+parser.add_argument("--work-list", choices=["never_scraped", "stale", "failed", "priority"],
+                    help="take URLs from --url-store instead of --urls")
+parser.add_argument("--stale-days", type=int, default=30, help="age after which a scrape is stale")
+parser.add_argument("--limit", type=int, help="max URLs to take from --work-list")
+parser.add_argument("--prioritise", action="store_true",
+                    help="scrape never-scraped auctions first, then recently ended ones, then the stalest "
+                         "(implied by --work-list priority), see schedule.py")
+parser.add_argument("--listing-dates", default="auction_urls.csv",
+                    help="CSV from save_auction_urls_to_csv with the date each URL was listed")
+parser.add_argument("--settle-days", type=int, default=7,
+                    help="days after listing during which an auction is rescraped for its final stats")
+parser.add_argument("--time-budget", type=float,
+                    help="minutes after which no new URLs are started; the rest go to <output>.queued.txt, "
+                         "which is kept in S3 and scraped first by the next run")
+parser.add_argument("--shard", help="only scrape shard i/N of the URLs (counted from 0), see sharding.py")
+parser.add_argument("--delta", action="store_true",
+                    help="only upload auctions that are new or changed since the last run, see changes.py")
+parser.add_argument("--fingerprint-index",
+                    help="fingerprints of the last run for --delta (default: <output>.fingerprints.jsonl.gz, "
+                         "fetched from S3 if missing)")
+parser.add_argument("--metrics", help="per-step timing report (default: <output>.metrics.json)")
+parser.add_argument("--prometheus-textfile", help="also write the timings in Prometheus text format to this file")
 
 
-# init driver
-driver = driver_setup.setup_driver()
+def main():
+    args = parser.parse_args()
 
-# scrape data
-results = []
-for url in urls:
-    auction_data = scrape_auction.scrape_auction_data(driver, url)
-    results.append(auction_data)
-    time.sleep(5)
+    shard = sharding.parse_shard(args.shard) if args.shard else None
+    source = args.work_list or os.path.splitext(os.path.basename(args.urls))[0]
+    shard_suffix = f"/shard={shard[0]}-of-{shard[1]}" if shard else ""
 
-# teardown driver
-driver_setup.driver_teardown(driver)
+    # runners start empty, so the URL store and the last run's queue are kept
+    # in S3 outside the dated partitions; a local copy wins over S3
+    store = None
+    if args.url_store:
+        store_key = f"rescraped/state{shard_suffix}/{os.path.basename(args.url_store)}"
+        if not os.path.exists(args.url_store) and not upload.download_file_from_s3(store_key, args.url_store):
+            print("No URL store from an earlier run, starting a new one")
+        store = url_store.UrlStore(args.url_store)
+    queue_file = args.output + ".queued.txt"
+    queue_key = f"rescraped/state/source={source}{shard_suffix}/queued.txt"
+    if not os.path.exists(queue_file):
+        upload.download_file_from_s3(queue_key, queue_file)
 
-# save to local json file
-upload.upload_to_s3(results)
+    if args.work_list:
+        if store is None:
+            parser.error("--work-list needs --url-store")
+        if args.work_list == "never_scraped":
+            urls = store.never_scraped(args.limit)
+        elif args.work_list == "failed":
+            # only what timed out or was blocked last time, not a full rerun
+            urls = store.failed(limit=args.limit)
+        elif args.work_list == "priority":
+            # every stored URL worth scraping; prioritised below
+            urls = [row[0] for row in store.rows()]
+        else:
+            urls = store.stale(args.stale_days, args.limit)
+    else:
+        with open(args.urls, "r") as file:
+            urls = [url.strip() for url in file.readlines() if url.strip()]
 
-notify.send_notification('github_actions', f"{len(results)} auctions scraped and saved successfully")
+    if shard:
+        urls = sharding.shard_urls(urls, *shard)
+        print(f"Shard {shard[0]}/{shard[1]}: {len(urls)} URLs")
 
+    tiers = None
+    if args.prioritise or args.work_list == "priority":
+        rows = schedule.url_rows(urls, store, schedule.read_listing_dates(args.listing_dates))
+        scheduled = schedule.prioritise(rows, args.settle_days, args.stale_days,
+                                        include_fresh=args.work_list != "priority")
+        if args.work_list == "priority" and args.limit:
+            scheduled = scheduled[:args.limit]
+        urls = [url for _, url in scheduled]
+        tiers = schedule.tier_counts(scheduled)
+        print("Scheduled " + ", ".join(f"{count} {name}" for name, count in tiers.items()))
+
+    queued = schedule.read_queue(queue_file)
+    if queued:
+        # the last run ran out of time before these
+        urls = schedule.queued_first(urls, queued)
+        print(f"{len(queued)} URLs queued by the last run go first")
+
+    workers = int(os.getenv("SCRAPER_WORKERS", "4"))
+    rate = float(os.getenv("SCRAPER_RATE", "0.5"))
+    lean = os.getenv("SCRAPER_LEAN", "1") == "1"
+
+    # results go to disk as each auction finishes, with a checkpoint of finished URLs
+    writer = checkpoint.CheckpointedWriter(args.output, resume=args.resume)
+    pending = writer.pending(urls)
+    print(f"{len(urls) - len(pending)} URLs already done, {len(pending)} to scrape")
+    parquet_writer = parquet_output.AuctionParquetWriter(args.parquet) if args.parquet else None
+
+    # results are uploaded in rolling gzip parts under a run_date/source partition
+    s3_prefix = upload.partition_prefix(source) + shard_suffix
+    uploaded_log = args.output + ".uploaded"
+    if not args.resume and os.path.exists(uploaded_log):
+        os.remove(uploaded_log)
+    uploader = upload.S3StreamUploader(s3_prefix, uploaded_log=uploaded_log)
+
+    detector = None
+    if args.delta:
+        # one index per URL file (and shard), kept outside the dated partitions so the next run finds it
+        index_key = f"rescraped/fingerprints/source={source}{shard_suffix}/index.jsonl.gz"
+        index_file = args.fingerprint_index or args.output + ".fingerprints.jsonl.gz"
+        if not os.path.exists(index_file) and not upload.download_file_from_s3(index_key, index_file):
+            print("No fingerprints from an earlier run, every auction counts as new")
+        detector = changes.ChangeDetector(index_file, args.output + ".delta.jsonl", resume=args.resume)
+
+    if args.resume:
+        # finished in an earlier run but lost with that run's last, unuploaded part
+        uploaded = set()
+        if os.path.exists(uploaded_log):
+            with open(uploaded_log, "r") as file:
+                uploaded = set(line.strip() for line in file if line.strip())
+        # with --delta only new and changed auctions are uploaded at all
+        previous = (entry["auction_data"] for entry in detector.iter_delta()) if detector else writer.iter_results()
+        for auction_data in previous:
+            if auction_data["auction_url"] not in uploaded:
+                uploaded.add(auction_data["auction_url"])
+                uploader.write(auction_data["auction_url"], auction_data)
+
+    run_stats = {"urls": len(urls), "already_done": len(urls) - len(pending), "scraped": 0}
+    started = time.monotonic()
+
+    def on_result(url, auction_data, status):
+        run_stats[status] = run_stats.get(status, 0) + 1
+        if store is not None:
+            store.mark_scraped(url, status)
+        if status in failures.TRANSIENT:
+            # left out of the output and checkpoint, so --resume fetches it again
+            return
+        writer.write(url, auction_data)
+        run_stats["scraped"] += 1
+        if parquet_writer is not None:
+            parquet_writer.write(auction_data)
+
+    async def run():
+        # fetch, parse, write, upload and notify run as separate stages so slow
+        # uploads or notifications never hold up the browsers; results are
+        # written locally by on_result and uploaded by the pipeline
+        scrape = pipeline.ScrapePipeline(
+            workers=workers, rate=rate, lean=lean,
+            parse_workers=int(os.getenv("SCRAPER_PARSE_WORKERS", "0")) or None,
+            fetcher=os.getenv("SCRAPER_FETCHER", "browser"),
+            max_driver_memory_mb=float(os.getenv("SCRAPER_DRIVER_MAX_MB", "1500")),
+            on_result=on_result, uploader=uploader, notify_topic='github_actions', changes=detector,
+            time_budget=args.time_budget * 60 if args.time_budget else None,
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            await scrape.run(pending)
+        finally:
+            # local state is saved first and each close runs even if another
+            # fails; uploader.close raises when a part stays unuploaded
+            try:
+                with contextlib.ExitStack() as local:
+                    local.callback(writer.close)
+                    if parquet_writer is not None:
+                        local.callback(parquet_writer.close)
+                    if store is not None:
+                        local.callback(store.close)
+                    if detector is not None:
+                        local.callback(detector.close)
+            finally:
+                try:
+                    await loop.run_in_executor(None, uploader.close)
+                finally:
+                    if store is not None:
+                        await loop.run_in_executor(None, upload.upload_file_to_s3, args.url_store, store_key)
+
+        run_stats["retries"] = sum(scrape.retries.values())
+        if tiers is not None:
+            run_stats.update({f"scheduled_{name}": count for name, count in tiers.items()})
+        run_stats["queued"] = len(scrape.unstarted)
+        # not checkpointed, so --resume (or the next run) picks them up; an
+        # empty queue replaces the one this run started from
+        schedule.write_queue(scrape.unstarted, queue_file)
+        await loop.run_in_executor(None, upload.upload_file_to_s3, queue_file, queue_key)
+        if scrape.unstarted:
+            print(f"{len(scrape.unstarted)} URLs left in {queue_file}")
+        # the runner's disk is thrown away; keep the fetched pages for reparse.py
+        run_stats["archived_pages"] = await loop.run_in_executor(None, archive.upload_archive)
+        print(f"{run_stats['archived_pages']} fetched pages archived to S3 under {archive.S3_PREFIX}/")
+        run_stats["breaker_trips"] = scrape.breaker.trips
+        run_stats["driver_relaunches"] = scrape.driver_recycles["memory"] + scrape.driver_recycles["pages"]
+        run_stats["driver_cache_clears"] = scrape.driver_recycles["cleared"]
+        run_stats["driver_peak_memory_mb"] = round(scrape.driver_peak_memory_mb, 1)
+
+        if detector is not None:
+            delta = detector.summary()
+            run_stats.update({f"delta_{name}": delta[name] for name in ("new", "changed", "unchanged")})
+            run_stats["changed_fields"] = delta["changed_fields"]
+            print(f"{delta['new']} new, {delta['changed']} changed, {delta['unchanged']} unchanged auctions")
+            await loop.run_in_executor(None, upload.upload_file_to_s3, detector.delta_file,
+                                       f"{s3_prefix}/changes-{int(time.time())}.jsonl")
+            await loop.run_in_executor(None, upload.upload_file_to_s3, detector.index_file, index_key)
+
+        # where the time went this run
+        run_stats["duration_seconds"] = round(time.monotonic() - started, 1)
+        run_stats["auctions_per_second"] = round(run_stats["scraped"] / max(run_stats["duration_seconds"], 1e-9), 3)
+        metrics_file = args.metrics or args.output + ".metrics.json"
+        report = metrics.write_metrics_json(metrics_file, run_stats)
+        if args.prometheus_textfile:
+            metrics.write_prometheus_textfile(args.prometheus_textfile, run_stats)
+        for step, summary in report["steps"].items():
+            print(f"{step}: {summary['count']}x, p50 {summary['p50']:.2f}s, p95 {summary['p95']:.2f}s, "
+                  f"p99 {summary['p99']:.2f}s, total {summary['total']:.0f}s")
+        await loop.run_in_executor(None, upload.upload_file_to_s3, metrics_file,
+                                   f"{s3_prefix}/metrics-{int(time.time())}.json")
+
+        if args.parquet:
+            await loop.run_in_executor(None, upload.upload_file_to_s3, args.parquet,
+                                       f"{s3_prefix}/results-{int(time.time())}.parquet")
+
+        message = f"{len(urls) - len(pending) + writer.count} auctions scraped and saved successfully"
+        problems = {status: count for status, count in scrape.statuses.items() if status != failures.OK}
+        if problems:
+            message += " (" + ", ".join(f"{count} {status}" for status, count in sorted(problems.items())) + ")"
+        if scrape.unstarted:
+            message += f", {len(scrape.unstarted)} left queued"
+        await scrape.finish(message)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+# step name -> list of seconds the step took, for spotting slow steps
+step_latencies = defaultdict(list)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+@contextmanager
+def record_step(name:str):
+    """
+    Records how long the wrapped block took under step_latencies[name].
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        step_latencies[name].append(time.perf_counter() - start)
+
+
+class SectionTimer:
+    """
+    Times consecutive sections of one long block without re-indenting it:
+    each lap(name) records the time since the previous lap (or since the
+    timer was made) under '<prefix>:<name>'.
+    """
+
+    def __init__(self, prefix:str):
+        self.prefix = prefix
+        self.last = time.perf_counter()
+
+    def lap(self, name:str):
+        now = time.perf_counter()
+        step_latencies[f'{self.prefix}:{name}'].append(now - self.last)
+        self.last = now
+
+
+def percentile(sorted_samples:list, q:float) -> float:
+    """
+    Nearest-rank percentile of already sorted samples.
+    """
+    rank = max(1, math.ceil(q * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def metrics_summary() -> dict:
+    """
+    Summarises the recorded steps: count, total, mean, p50/p95/p99 and max seconds.
+    """
+    summary = {}
+    for name, samples in sorted(step_latencies.items()):
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        summary[name] = {
+            'count': len(ordered),
+            'total': sum(ordered),
+            'mean': sum(ordered) / len(ordered),
+            **{f'p{int(q * 100)}': percentile(ordered, q) for q in QUANTILES},
+            'max': ordered[-1],
+        }
+    return summary
+
+
+def _write_atomic(path:str, text:str):
+    # readers (e.g. node_exporter's textfile collector) never see a half-written file
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_metrics_json(path:str, run:dict = None) -> dict:
+    """
+    Writes the step summary, plus run-level figures such as the auction
+    count and duration, to a JSON file.
+
+    Returns:
+        dict: What was written
+    """
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'run': run or {},
+        'steps': metrics_summary(),
+    }
+    _write_atomic(path, json.dumps(report, indent=2))
+    return report
+
+
+def _label(value:str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_prometheus_textfile(path:str, run:dict = None, prefix:str = 'scraper'):
+    """
+    Writes the step summary in the Prometheus text format, for
+    node_exporter's textfile collector. Steps become a summary metric
+    <prefix>_step_seconds{step=...} with p50/p95/p99 quantiles; numeric run
+    figures become gauges <prefix>_run_<name>.
+    """
+    lines = [
+        f'# HELP {prefix}_step_seconds Time spent per scrape step',
+        f'# TYPE {prefix}_step_seconds summary',
+    ]
+    for name, stats in metrics_summary().items():
+        step = _label(name)
+        for q in QUANTILES:
+            lines.append(f'{prefix}_step_seconds{{step="{step}",quantile="{q}"}} '
+                         f'{stats[f"p{int(q * 100)}"]:.6f}')
+        lines.append(f'{prefix}_step_seconds_sum{{step="{step}"}} {stats["total"]:.6f}')
+        lines.append(f'{prefix}_step_seconds_count{{step="{step}"}} {stats["count"]}')
+
+    for name, value in (run or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f'# TYPE {prefix}_run_{name} gauge')
+            lines.append(f'{prefix}_run_{name} {value}')
+
+    _write_atomic(path, '\n'.join(lines) + '\n')
@@ -2,5 +2,6 @@ import requests
 def send_notification(topic, message):
     requests.post(
         f"https://ntfy.sh/{topic}",
-        data=f"{message}".encode(encoding='utf-8')
+        data=f"{message}".encode(encoding='utf-8'),
+        timeout=10
     )
\ No newline at end of file
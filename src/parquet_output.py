@@ -0,0 +1,105 @@
+import threading
+from datetime import datetime
+
+from records import QUICK_FACT_KEYS, AuctionRecord, BidMetrics, from_legacy, to_row
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, only needed for Parquet output
+    pa = None
+
+
+def flatten_auction(auction_data) -> dict:
+    """
+    Flattens an auction_data dict (or a records.AuctionRecord) into one typed
+    row: numbers parsed, the end date as a datetime, quick facts as columns,
+    lists kept as lists.
+    """
+    record = auction_data if isinstance(auction_data, AuctionRecord) else from_legacy(auction_data)
+    return to_row(record)
+
+
+def auction_schema():
+    _require_pyarrow()
+    string_list = pa.list_(pa.string())
+    fields = [
+        ('auction_url', pa.string()),
+        ('auction_title', pa.string()),
+        ('auction_subtitle', pa.string()),
+        ('reserve_status', pa.string()),
+        ('auction_status', pa.string()),
+        ('highest_bid_value', pa.int64()),
+        ('buyer_username', pa.string()),
+        ('seller_username', pa.string()),
+        ('bid_count', pa.int32()),
+        ('view_count', pa.int32()),
+        ('watcher_count', pa.int32()),
+        ('auction_date', pa.timestamp('s')),
+        ('auction_date_raw', pa.string()),
+        ('bids', pa.list_(pa.int64())),
+        ('bid_history', pa.list_(pa.struct([
+            ('bidder', pa.string()),
+            ('time', pa.string()),
+            ('amount', pa.int64()),
+            ('verified', pa.bool_()),
+            ('reputation', pa.string()),
+        ]))),
+    ]
+    # same columns, in the same order, as records.to_row; bid metric times are ISO strings there
+    metric_types = {int: pa.int64(), float: pa.float64(), datetime: pa.string()}
+    fields += [(name, metric_types[BidMetrics.__annotations__[name]]) for name in BidMetrics.__slots__]
+    fields += [(name, pa.string()) for name in QUICK_FACT_KEYS]
+    fields += [
+        ('mileage', pa.string()),
+        ('mileage_value', pa.int64()),
+        ('dougs_take', pa.string()),
+        ('highlights_description', pa.string()),
+        ('highlights', string_list),
+        ('known_flaws', string_list),
+        ('service_history_description', pa.string()),
+        ('service_history_items', string_list),
+        ('included_items', string_list),
+        ('ownership_history', pa.string()),
+        ('seller_notes', string_list),
+        ('auction_videos', string_list),
+    ]
+    return pa.schema(fields)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet output needs pyarrow: uv sync --extra parquet")
+
+
+class AuctionParquetWriter:
+    """
+    Writes flattened auctions to a compressed Parquet file as the scrape
+    streams, one row group every row_group_size auctions, so only a single
+    row group is ever held in memory.
+    """
+
+    def __init__(self, path:str, row_group_size:int = 1000, compression:str = 'zstd'):
+        _require_pyarrow()
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = auction_schema()
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        self.rows = []
+        self.lock = threading.Lock()
+
+    def write(self, auction_data):
+        with self.lock:
+            self.rows.append(flatten_auction(auction_data))
+            if len(self.rows) >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        if self.rows:
+            self.writer.write_table(pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.writer.close()
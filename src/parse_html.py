@@ -0,0 +1,349 @@
+import os
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from scrape_auction import new_auction_data, parse_auction_snapshot
+from metrics import SectionTimer, record_step
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # lxml is optional, BeautifulSoup's html.parser always works
+    lxml_html = None
+
+
+BASE_URL = 'https://carsandbids.com'
+
+
+def _clean(text:str) -> str:
+    # Collapse whitespace the way the browser's innerText does for inline text
+    return ' '.join(text.split())
+
+
+# ---------------------------------------------------------------------------
+# BeautifulSoup backend (pure Python, always available)
+# ---------------------------------------------------------------------------
+
+def _soup_text(root, selector:str = None):
+    element = root.select_one(selector) if root is not None and selector else root
+    return _clean(element.get_text()) if element is not None else None
+
+
+def _soup_texts(root, selector:str):
+    if root is None:
+        return None
+    return [_clean(element.get_text()) for element in root.select(selector)]
+
+
+def _soup_auction_snapshot(html:str) -> dict:
+    timer = SectionTimer('parse')
+    soup = BeautifulSoup(html, 'html.parser')
+    text, texts = _soup_text, _soup_texts
+
+    # Index detail sections in one pass instead of a document scan per section
+    sections = {}
+    for element in soup.select('.detail-section'):
+        for class_name in element.get('class', []):
+            sections.setdefault(class_name, element)
+    section = sections.get
+    timer.lap('document')
+
+    status = soup.select_one('.current-bid.ended')
+    snapshot = {
+        'title': text(soup, '.auction-title h1'),
+        'subtitle': text(soup, '.d-md-flex.justify-content-between.flex-wrap h2'),
+        'reserve': text(soup, '#auction-jump h3 span'),
+        'status': {
+            'cancelled': 'cancelled' in status.get('class', []),
+            'header': text(status, 'h4'),
+            'buyer': text(status, '.username .user'),
+            'bid_value': text(status, '.bid-value'),
+        } if status is not None else None,
+    }
+    timer.lap('header')
+
+    stats = soup.select_one('ul.stats')
+    snapshot['seller'] = text(stats, 'li.seller .user')
+    snapshot['stats'] = [
+        [text(li, '.th'), text(li, '.td')]
+        for li in stats.select('li:not(.seller)')
+    ] if stats is not None else None
+    timer.lap('stats')
+
+    quick_facts = soup.select_one('.quick-facts')
+    facts = None
+    if quick_facts is not None:
+        facts = []
+        for dl in quick_facts.select('dl'):
+            items = []
+            for dt in dl.select('dt'):
+                dd = dt.find_next_sibling('dd')
+                items.append({
+                    'label': text(dt),
+                    'text': text(dd),
+                    'link': text(dd, 'a'),
+                    'user': text(dd, '.user'),
+                })
+            facts.append(items)
+    snapshot['quick_facts'] = facts
+    timer.lap('quick_facts')
+
+    highlights = section('detail-highlights')
+    highlights_body = highlights.select_one('.detail-body') if highlights else None
+    service = section('detail-recent_service_history')
+    videos = section('detail-videos')
+    snapshot.update({
+        'dougs_take': text(section('dougs-take'), '.detail-body p'),
+        'highlights': {
+            'description': text(highlights_body, 'p'),
+            'bullet_points': texts(highlights_body, 'ul li'),
+        } if highlights_body is not None else None,
+        'known_flaws': texts(section('detail-known_flaws'), '.detail-body li'),
+        'service_history': {
+            'description': text(service, '.detail-body p'),
+            'items': texts(service, '.detail-body li'),
+        } if service is not None else None,
+        'included_items': texts(section('detail-other_items'), '.detail-body li'),
+        'ownership_history': text(section('detail-ownership_history'), '.detail-body p'),
+        'seller_notes': texts(section('detail-seller_notes'), '.detail-body li'),
+        'videos': [
+            img.get('src') for img in videos.select('.video-embed img.video-preview')
+        ] if videos is not None else None,
+    })
+    timer.lap('details')
+
+    snapshot['bid_records'] = [
+        {
+            'bidder': text(li, '.user'),
+            'time': li.select_one('.time').get('data-full') if li.select_one('.time') else None,
+            'amount': text(li, '.bid-value'),
+            'verified': li.select_one('.verified') is not None,
+            'reputation': text(li, '.rep'),
+        }
+        for li in soup.select('.thread li.bid')
+    ]
+    timer.lap('bids')
+    return snapshot
+
+
+def _soup_auction_urls(html:str) -> list:
+    soup = BeautifulSoup(html, 'html.parser')
+    return [link['href'] for link in soup.select('.auction-item .auction-title a[href]')]
+
+
+# ---------------------------------------------------------------------------
+# lxml backend (C parser with precompiled XPath, much faster)
+# ---------------------------------------------------------------------------
+
+def _has_class(name:str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if lxml_html is not None:
+    _XPATHS = {name: etree.XPath(path) for name, path in {
+        'title': f"//*[{_has_class('auction-title')}]//h1",
+        'subtitle': (f"//*[{_has_class('d-md-flex')} and {_has_class('justify-content-between')}"
+                     f" and {_has_class('flex-wrap')}]//h2"),
+        'reserve': "//*[@id='auction-jump']//h3//span",
+        'status': f"//*[{_has_class('current-bid')} and {_has_class('ended')}]",
+        'stats': f"//ul[{_has_class('stats')}]",
+        'quick_facts': f"//*[{_has_class('quick-facts')}]",
+        'sections': f"//*[{_has_class('detail-section')}]",
+        'bids': f"//*[{_has_class('thread')}]//li[{_has_class('bid')}]",
+        'time': f".//*[{_has_class('time')}]",
+        'verified': f".//*[{_has_class('verified')}]",
+        'rep': f".//*[{_has_class('rep')}]",
+        'h4': ".//h4",
+        'buyer': f".//*[{_has_class('username')}]//*[{_has_class('user')}]",
+        'bid_value': f".//*[{_has_class('bid-value')}]",
+        'seller': f".//li[{_has_class('seller')}]//*[{_has_class('user')}]",
+        'stat_items': f".//li[not({_has_class('seller')})]",
+        'th': f".//*[{_has_class('th')}]",
+        'td': f".//*[{_has_class('td')}]",
+        'dl': ".//dl",
+        'dt': ".//dt",
+        'next_dd': "following-sibling::dd[1]",
+        'link': ".//a",
+        'user': f".//*[{_has_class('user')}]",
+        'body': f".//*[{_has_class('detail-body')}]",
+        'body_p': f".//*[{_has_class('detail-body')}]//p",
+        'body_li': f".//*[{_has_class('detail-body')}]//li",
+        'p': ".//p",
+        'ul_li': ".//ul//li",
+        'video_src': f".//*[{_has_class('video-embed')}]//img[{_has_class('video-preview')}]/@src",
+        'listing_links': (f"//*[{_has_class('auction-item')}]//*[{_has_class('auction-title')}]"
+                          "//a[@href]/@href"),
+    }.items()}
+
+
+def _lxml_first(root, name:str):
+    if root is None:
+        return None
+    found = _XPATHS[name](root)
+    return found[0] if found else None
+
+
+def _lxml_text(root, name:str = None):
+    element = _lxml_first(root, name) if name else root
+    return _clean(element.text_content()) if element is not None else None
+
+
+def _lxml_texts(root, name:str):
+    if root is None:
+        return None
+    return [_clean(element.text_content()) for element in _XPATHS[name](root)]
+
+
+def _lxml_auction_snapshot(html:str) -> dict:
+    timer = SectionTimer('parse')
+    doc = lxml_html.fromstring(html)
+    first, text, texts = _lxml_first, _lxml_text, _lxml_texts
+
+    sections = {}
+    for element in _XPATHS['sections'](doc):
+        for class_name in element.get('class', '').split():
+            sections.setdefault(class_name, element)
+    section = sections.get
+    timer.lap('document')
+
+    status = first(doc, 'status')
+    snapshot = {
+        'title': text(doc, 'title'),
+        'subtitle': text(doc, 'subtitle'),
+        'reserve': text(doc, 'reserve'),
+        'status': {
+            'cancelled': 'cancelled' in status.get('class', '').split(),
+            'header': text(status, 'h4'),
+            'buyer': text(status, 'buyer'),
+            'bid_value': text(status, 'bid_value'),
+        } if status is not None else None,
+    }
+    timer.lap('header')
+
+    stats = first(doc, 'stats')
+    snapshot['seller'] = text(stats, 'seller')
+    snapshot['stats'] = [
+        [text(li, 'th'), text(li, 'td')]
+        for li in _XPATHS['stat_items'](stats)
+    ] if stats is not None else None
+    timer.lap('stats')
+
+    quick_facts = first(doc, 'quick_facts')
+    facts = None
+    if quick_facts is not None:
+        facts = []
+        for dl in _XPATHS['dl'](quick_facts):
+            items = []
+            for dt in _XPATHS['dt'](dl):
+                dd = first(dt, 'next_dd')
+                items.append({
+                    'label': text(dt),
+                    'text': text(dd),
+                    'link': text(dd, 'link'),
+                    'user': text(dd, 'user'),
+                })
+            facts.append(items)
+    snapshot['quick_facts'] = facts
+    timer.lap('quick_facts')
+
+    highlights_body = first(section('detail-highlights'), 'body')
+    service = section('detail-recent_service_history')
+    videos = section('detail-videos')
+    snapshot.update({
+        'dougs_take': text(section('dougs-take'), 'body_p'),
+        'highlights': {
+            'description': text(highlights_body, 'p'),
+            'bullet_points': texts(highlights_body, 'ul_li'),
+        } if highlights_body is not None else None,
+        'known_flaws': texts(section('detail-known_flaws'), 'body_li'),
+        'service_history': {
+            'description': text(service, 'body_p'),
+            'items': texts(service, 'body_li'),
+        } if service is not None else None,
+        'included_items': texts(section('detail-other_items'), 'body_li'),
+        'ownership_history': text(section('detail-ownership_history'), 'body_p'),
+        'seller_notes': texts(section('detail-seller_notes'), 'body_li'),
+        'videos': [str(src) for src in _XPATHS['video_src'](videos)] if videos is not None else None,
+    })
+    timer.lap('details')
+
+    snapshot['bid_records'] = [
+        {
+            'bidder': text(li, 'user'),
+            'time': first(li, 'time').get('data-full') if first(li, 'time') is not None else None,
+            'amount': text(li, 'bid_value'),
+            'verified': first(li, 'verified') is not None,
+            'reputation': text(li, 'rep'),
+        }
+        for li in _XPATHS['bids'](doc)
+    ]
+    timer.lap('bids')
+    return snapshot
+
+
+def _lxml_auction_urls(html:str) -> list:
+    return [str(href) for href in _XPATHS['listing_links'](lxml_html.fromstring(html))]
+
+
+# Backend name -> (auction snapshot builder, listing URL extractor)
+PARSER_BACKENDS = {'bs4': (_soup_auction_snapshot, _soup_auction_urls)}
+if lxml_html is not None:
+    PARSER_BACKENDS['lxml'] = (_lxml_auction_snapshot, _lxml_auction_urls)
+
+# Fastest backend first
+PARSER_PREFERENCE = ['lxml', 'bs4']
+
+
+def select_parser(name:str = None) -> str:
+    """
+    Picks the HTML parser backend used for offline parsing.
+
+    Args:
+        name: Backend to use ('lxml' or 'bs4'). Falls back to the HTML_PARSER
+            env variable, then the first installed entry of PARSER_PREFERENCE.
+
+    Returns:
+        Name of an installed backend
+    """
+    name = name or os.getenv('HTML_PARSER')
+    if name:
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"HTML parser '{name}' is not installed")
+        return name
+    return next(backend for backend in PARSER_PREFERENCE if backend in PARSER_BACKENDS)
+
+
+def parse_auction_html(html:str, url:str, parser:str = None) -> dict:
+    """
+    Parses a saved auction page into the auction_data dict produced by
+    scrape_auction_data, without a browser.
+
+    Args:
+        html: Rendered HTML of the auction page (with bid history shown)
+        url: URL of the auction page
+        parser: Parser backend name, see select_parser
+
+    Returns:
+        Dictionary containing all scraped auction details
+    """
+    build_snapshot, _ = PARSER_BACKENDS[select_parser(parser)]
+    with record_step('parse:html'):
+        snapshot = build_snapshot(html)
+    with record_step('parse:map'):
+        return parse_auction_snapshot(new_auction_data(url), snapshot)
+
+
+def parse_auction_urls_html(html:str, parser:str = None, base_url:str = BASE_URL) -> list:
+    """
+    Extracts auction URLs from a saved past-auctions listing page.
+
+    Args:
+        html: Rendered HTML of a past-auctions page
+        parser: Parser backend name, see select_parser
+        base_url: Used to make relative links absolute
+
+    Returns:
+        list: Auction URLs in page order
+    """
+    _, extract_urls = PARSER_BACKENDS[select_parser(parser)]
+    return [urljoin(base_url, href) for href in extract_urls(html)]
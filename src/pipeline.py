@@ -0,0 +1,498 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from urllib3.exceptions import HTTPError as DriverConnectionError
+
+import api_fetch
+import archive
+import driver_setup
+import failures
+import metrics
+import notify
+import parse_html
+import scrape_auction
+from metrics import record_step
+from rate_limit import DomainRateLimiter
+
+
+# Marks the end of a stage's input; each worker of the next stage gets one
+_DONE = object()
+
+
+class BrowserFetcher:
+    """
+    One fetch-stage worker: owns a headless browser and turns an auction URL
+    into the page's rendered HTML (bid history shown). Every call runs on the
+    fetch thread pool, never on the event loop.
+    """
+
+    def __init__(self, limiter, lean:bool = False, max_pages_per_driver:int = 1000,
+                 max_driver_memory_mb:float = 1500, max_attempts:int = 2):
+        self.limiter = limiter
+        self.session = driver_setup.ManagedDriver(lean, max_pages_per_driver, max_driver_memory_mb)
+        self.max_attempts = max_attempts
+
+    def fetch(self, url:str):
+        """
+        Returns (html, timed_out). On a timeout the HTML is whatever did
+        load, so block pages can still be recognised; html is None if the
+        driver kept failing.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                driver = self.session.get()
+                with record_step('rate_limit_wait'):
+                    self.limiter.acquire(url)
+                timed_out = False
+                try:
+                    with record_step('page_load'):
+                        driver.get(url)
+                    driver_setup.close_promo_bar(driver)
+                    with record_step('bid_history'):
+                        scrape_auction.show_bid_history(driver)
+                except TimeoutException:
+                    print(f"Timeout while scraping {url}")
+                    timed_out = True
+                with record_step('page_source'):
+                    html = driver.page_source
+                # may relaunch the browser, so only once the page is read
+                self.session.page_done()
+                return html, timed_out
+
+            # a dead chromedriver (e.g. OOM-killed) surfaces as an unwrapped urllib3 or socket error
+            except (WebDriverException, DriverConnectionError, ConnectionError) as e:
+                print(f"❌ Driver failed on {url} (attempt {attempt}): {e}")
+                self.session.discard()
+        # a browser that will not load the page counts as a timeout, it is worth a later retry
+        return None, True
+
+    def close(self):
+        self.session.close()
+
+
+class ApiFailures:
+    """
+    Consecutive API failures across every ApiFetcher; once there are limit
+    in a row the API counts as unavailable for the rest of the run.
+    """
+
+    def __init__(self, limit:int = 5):
+        self.limit = limit
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def available(self) -> bool:
+        with self.lock:
+            return self.count < self.limit
+
+    def success(self):
+        with self.lock:
+            if self.count < self.limit:
+                self.count = 0
+
+    def failure(self) -> bool:
+        """
+        Counts a failure; True for the one that makes the API unavailable.
+        """
+        with self.lock:
+            self.count += 1
+            return self.count == self.limit
+
+
+class ApiFetcher:
+    """
+    Fetch-stage worker for the JSON API. Returns a finished auction_data dict
+    (nothing to parse) in place of the HTML, or hands the URL to a BrowserFetcher once the API
+    fails ApiFailures.limit times in a row across all workers.
+    """
+
+    def __init__(self, limiter, session, fallback:BrowserFetcher, api_failures:ApiFailures):
+        self.limiter = limiter
+        self.session = session
+        self.fallback = fallback
+        self.api_failures = api_failures
+
+    def fetch(self, url:str):
+        if self.api_failures.available():
+            try:
+                self.limiter.acquire(api_fetch.API_BASE)
+                auction_data = api_fetch.fetch_auction_data(self.session, url)
+                self.api_failures.success()
+                return auction_data, False
+            except (api_fetch.ApiUnavailable, KeyError, TypeError, ValueError) as e:
+                print(f"⚠️ API fetch failed for {url}: {e}")
+                if self.api_failures.failure():
+                    print("⚠️ API looks unavailable, using the browser for the remaining auctions")
+        return self.fallback.fetch(url)
+
+    def close(self):
+        self.fallback.close()
+
+
+def parse_page(html:str, url:str, parser:str = None):
+    """
+    Parse-stage job, run in a worker process. Returns the auction_data and
+    the step timings recorded while parsing, since the worker's own
+    metrics never reach the main process otherwise.
+    """
+    metrics.step_latencies.clear()
+    auction_data = parse_html.parse_auction_html(html, url, parser)
+    return auction_data, dict(metrics.step_latencies)
+
+
+async def _stage(inbox, outbox, handlers:list, next_workers:int = 0, on_error=None):
+    """
+    Runs one worker per handler, each taking items from inbox until it sees
+    _DONE. Non-None handler results go to outbox; once every worker is done,
+    next_workers _DONE markers are passed on. on_error(item) is called for
+    items whose handler raised.
+    """
+    async def worker(handle):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            try:
+                result = await handle(item)
+            except Exception as e:
+                # the item is left out of this run; a --resume run picks it up again
+                print(f"❌ Pipeline stage failed on {item!r:.120}: {e}")
+                if on_error is not None:
+                    on_error(item)
+                continue
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(worker(handle) for handle in handlers))
+    for _ in range(next_workers):
+        await outbox.put(_DONE)
+
+
+class ScrapePipeline:
+    """
+    Asyncio scrape pipeline. Each stage has its own workers and hands its
+    output to the next stage through a bounded queue, so a slow stage holds
+    back only the stages feeding it:
+
+        discover -> fetch (browser/API, thread pool)
+                 -> parse (HTML parsing, process pool)
+                 -> output (classify, retry or on_result, one thread)
+                 -> upload (uploader.write, its own thread)
+
+    Every fetched auction is classified (see failures.classify). Timeouts,
+    block pages and pages without a title are fetched again after an
+    exponential backoff with jitter, up to failures.RETRY_LIMITS times;
+    waiting retries rejoin the fetch queue when their delay is up, and the
+    run only ends once none are left. A CircuitBreaker on the shared rate
+    limiter slows every fetcher down while the block rate is high.
+    Auctions still timed out or blocked after their retries go to on_result
+    with that status but are not uploaded.
+
+    Notifications go through a small queue with their own worker; when it is
+    full a progress message is dropped rather than waiting. The upload queue
+    holds up to upload_buffer records, so S3 slowness only reaches the
+    fetchers once that much is waiting.
+    """
+
+    def __init__(self, workers:int = 4, rate:float = 0.5, lean:bool = False,
+                 parse_workers:int = None, parser:str = None, fetcher:str = 'browser',
+                 on_result=None, uploader=None, notify_topic:str = None,
+                 notify_every:int = 0, upload_buffer:int = 10000,
+                 max_pages_per_driver:int = 1000, max_driver_memory_mb:float = 1500,
+                 archive_pages:bool = True,
+                 retry_base_delay:float = 5, changes=None, time_budget:float = None):
+        """
+        Args:
+            workers: Browsers (or API sessions) fetching at once
+            rate: Maximum page loads per second per domain, across all workers
+            lean: Launch drivers with the lean resource-blocking profile
+            parse_workers: Processes parsing HTML (default: CPU count)
+            parser: HTML parser backend, see parse_html.select_parser
+            fetcher: 'browser', or 'api' for the JSON API with browser fallback
+            on_result: Callable(url, auction_data, status) for local output,
+                e.g. the checkpointed writer; status is one of the failures
+                classes. Runs on a single thread.
+            uploader: Object with write(url, auction_data), e.g.
+                upload.S3StreamUploader
+            notify_topic: ntfy topic for notify() and progress messages
+            notify_every: Send a progress message every N results (0: off)
+            upload_buffer: Records the upload queue holds before it pushes back
+            max_pages_per_driver: Pages a driver serves before it is relaunched
+            max_driver_memory_mb: Memory of a browser's process tree above
+                which it is cleared and, if that is not enough, relaunched
+                (0: pages only), see driver_setup.ManagedDriver
+            archive_pages: Save fetched HTML to the archive
+            retry_base_delay: Backoff before the first retry, in seconds
+            changes: changes.ChangeDetector. When given, only auctions that
+                are ok and new or changed since the last run are uploaded
+            time_budget: Seconds after which no new URLs are started and no
+                more retries scheduled; what is in flight still finishes. The
+                URLs never started are left in self.unstarted
+        """
+        self.workers = max(1, workers)
+        self.rate = rate
+        self.lean = lean
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.parser = parser
+        self.fetcher = fetcher
+        self.on_result = on_result
+        self.uploader = uploader
+        self.notify_topic = notify_topic
+        self.notify_every = notify_every
+        self.upload_buffer = upload_buffer
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_driver_memory_mb = max_driver_memory_mb
+        self.archive_pages = archive_pages
+        self.retry_base_delay = retry_base_delay
+        self.changes = changes
+        self.time_budget = time_budget
+        self.unstarted = []
+        self.count = 0
+        self.statuses = Counter()
+        self.retries = Counter()
+        self.driver_recycles = Counter()
+        self.driver_peak_memory_mb = 0.0
+
+    def _make_fetchers(self) -> list:
+        limiter = DomainRateLimiter(self.rate)
+        self.breaker = failures.CircuitBreaker(limiter)
+        browsers = [
+            BrowserFetcher(limiter, self.lean, self.max_pages_per_driver, self.max_driver_memory_mb)
+            for _ in range(self.workers)
+        ]
+        self.browsers = browsers
+        if self.fetcher != 'api':
+            return browsers
+        session = api_fetch.make_session(pool_size=self.workers)
+        api_failures = ApiFailures()
+        return [ApiFetcher(limiter, session, browser, api_failures) for browser in browsers]
+
+    def notify(self, message:str):
+        """
+        Queues a notification without waiting; dropped if the queue is full.
+        """
+        if self.notify_topic is None:
+            return
+        try:
+            self.notify_queue.put_nowait(message)
+        except asyncio.QueueFull:
+            print(f"Notification dropped: {message}")
+
+    async def run(self, urls) -> int:
+        """
+        Scrapes every URL in urls (any iterable, consumed lazily) and returns
+        how many results were produced.
+        """
+        loop = asyncio.get_running_loop()
+        fetch_pool = ThreadPoolExecutor(self.workers, thread_name_prefix='fetch')
+        # spawn, not fork: the fetch threads are already running when workers start
+        def new_parse_pool():
+            return ProcessPoolExecutor(self.parse_workers, mp_context=multiprocessing.get_context('spawn'))
+        parse_pool = new_parse_pool()
+        output_pool = ThreadPoolExecutor(1, thread_name_prefix='output')
+        upload_pool = ThreadPoolExecutor(1, thread_name_prefix='upload')
+        notify_pool = ThreadPoolExecutor(1, thread_name_prefix='notify')
+
+        url_queue = asyncio.Queue(self.workers * 2)
+        page_queue = asyncio.Queue(self.parse_workers * 2)
+        result_queue = asyncio.Queue(self.workers * 2)
+        upload_queue = asyncio.Queue(self.upload_buffer)
+        self.notify_queue = asyncio.Queue(100)
+
+        fetchers = self._make_fetchers()
+        deadline = time.monotonic() + self.time_budget if self.time_budget else None
+
+        # URLs taken from the source and not settled yet, waiting retries included
+        in_flight = 0
+        settled = asyncio.Event()
+        retry_timers = set()
+
+        def settle(*_):
+            nonlocal in_flight
+            in_flight -= 1
+            if in_flight == 0:
+                settled.set()
+
+        async def discover():
+            nonlocal in_flight
+            pending = iter(urls)
+            for url in pending:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.unstarted = [url, *pending]
+                    print(f"⏱️ Time budget used up, leaving {len(self.unstarted)} URLs for a later run")
+                    break
+                in_flight += 1
+                settled.clear()
+                await url_queue.put((url, 1))
+            # retries feed back into url_queue, so it may only close once nothing is left
+            if in_flight:
+                await settled.wait()
+            for _ in fetchers:
+                await url_queue.put(_DONE)
+
+        async def retry_later(url, attempt, delay):
+            await asyncio.sleep(delay)
+            await url_queue.put((url, attempt))
+
+        def fetch_handler(fetcher):
+            async def handle(item):
+                url, attempt = item
+                start = time.perf_counter()
+                page, timed_out = await loop.run_in_executor(fetch_pool, fetcher.fetch, url)
+                metrics.step_latencies['fetch'].append(time.perf_counter() - start)
+                if isinstance(page, dict):
+                    return (url, attempt, None, page, timed_out)
+                return (url, attempt, page, None, timed_out)
+            return handle
+
+        async def parse(item):
+            nonlocal parse_pool
+            url, attempt, html, auction_data, timed_out = item
+            status = None
+            if auction_data is None and html is None:
+                auction_data = scrape_auction.new_auction_data(url)
+            elif html is not None:
+                pool = parse_pool
+                try:
+                    auction_data, timings = await loop.run_in_executor(
+                        pool, parse_page, html, url, self.parser)
+                    for step, samples in timings.items():
+                        metrics.step_latencies[step].extend(samples)
+                except BrokenProcessPool as e:
+                    # a worker died (e.g. OOM-killed); every later submit would fail too
+                    print(f"Parse worker died on {url}: {e}")
+                    if parse_pool is pool:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        parse_pool = new_parse_pool()
+                    auction_data, status = scrape_auction.new_auction_data(url), failures.PARSE_ERROR
+                except Exception as e:
+                    print(f"Error parsing {url}: {str(e)}")
+                    auction_data, status = scrape_auction.new_auction_data(url), failures.PARSE_ERROR
+            if status is None:
+                status = failures.classify(auction_data, html, timed_out)
+            self.breaker.record(status)
+            return (url, attempt, html, auction_data, status)
+
+        def write_output(url, html, auction_data, status):
+            if html is not None and self.archive_pages:
+                with record_step('archive'):
+                    archive.save_page(url, html)
+            change = None
+            if self.changes is not None and status == failures.OK:
+                with record_step('fingerprint'):
+                    change = self.changes.check(url, auction_data)
+            if self.on_result is not None:
+                with record_step('output'):
+                    self.on_result(url, auction_data, status)
+            return change
+
+        async def output(item):
+            url, attempt, html, auction_data, status = item
+            delay = failures.backoff_delay(attempt, self.retry_base_delay)
+            if (attempt <= failures.RETRY_LIMITS.get(status, 0)
+                    and (deadline is None or time.monotonic() + delay < deadline)):
+                print(f"🔁 {status} on {url}, retry {attempt} in {delay:.0f}s")
+                self.retries[status] += 1
+                timer = asyncio.create_task(retry_later(url, attempt + 1, delay))
+                retry_timers.add(timer)
+                timer.add_done_callback(retry_timers.discard)
+                return None
+
+            try:
+                change = await loop.run_in_executor(output_pool, write_output, url, html, auction_data, status)
+            finally:
+                settle()
+            self.count += 1
+            self.statuses[status] += 1
+            if self.notify_every and self.count % self.notify_every == 0:
+                self.notify(f"{self.count} auctions scraped so far")
+            if status in failures.TRANSIENT:
+                return None
+            if self.changes is not None and change is None:
+                return None
+            return (url, auction_data)
+
+        async def upload(item):
+            try:
+                await loop.run_in_executor(upload_pool, self.uploader.write, *item)
+            except Exception as e:
+                print(f"❌ Upload failed for {item[0]}: {e}")
+
+        async def send_notifications():
+            while True:
+                message = await self.notify_queue.get()
+                if message is _DONE:
+                    return
+                try:
+                    await loop.run_in_executor(notify_pool, notify.send_notification, self.notify_topic, message)
+                except Exception as e:
+                    print(f"Notification failed: {e}")
+
+        self.notifier = asyncio.create_task(send_notifications())
+        self.notify_pool = notify_pool
+
+        stages = [
+            discover(),
+            _stage(url_queue, page_queue, [fetch_handler(fetcher) for fetcher in fetchers],
+                   self.parse_workers, on_error=settle),
+            _stage(page_queue, result_queue, [parse] * self.parse_workers, 1, on_error=settle),
+        ]
+        if self.uploader is not None:
+            stages += [_stage(result_queue, upload_queue, [output], 1), _stage(upload_queue, None, [upload])]
+        else:
+            stages.append(_stage(result_queue, None, [output]))
+
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            await asyncio.gather(*(loop.run_in_executor(fetch_pool, fetcher.close) for fetcher in fetchers))
+            for browser in self.browsers:
+                self.driver_recycles.update(browser.session.recycles)
+                self.driver_peak_memory_mb = max(self.driver_peak_memory_mb, browser.session.peak_memory_mb)
+            for pool in (fetch_pool, parse_pool, output_pool, upload_pool):
+                pool.shutdown(wait=True)
+        return self.count
+
+    async def finish(self, message:str = None, timeout:float = 30):
+        """
+        Queues a final message and waits up to timeout seconds for queued
+        notifications to go out.
+        """
+        if message is not None:
+            self.notify(message)
+        await self.notify_queue.put(_DONE)
+        try:
+            await asyncio.wait_for(self.notifier, timeout)
+        except asyncio.TimeoutError:
+            print("Notifications still pending, giving up on them")
+        self.notify_pool.shutdown(wait=False)
+
+
+def run_pipeline(urls, final_message=None, **kwargs) -> int:
+    """
+    Runs a ScrapePipeline to completion from synchronous code.
+
+    Args:
+        urls: Auction URLs to scrape
+        final_message: Callable(count) -> str sent as the last notification
+        **kwargs: ScrapePipeline options
+
+    Returns:
+        int: Number of results produced
+    """
+    async def main():
+        pipeline = ScrapePipeline(**kwargs)
+        try:
+            await pipeline.run(urls)
+        finally:
+            await pipeline.finish(final_message(pipeline.count) if final_message else None)
+        return pipeline.count
+
+    return asyncio.run(main())
@@ -0,0 +1,79 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows `rate` requests per second on average
+    with bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate:float, capacity:float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now:float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Blocks until a token is available, then consumes it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate:float):
+        """
+        Changes the refill rate, keeping the tokens earned so far.
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+
+class DomainRateLimiter:
+    """
+    Keeps one TokenBucket per domain so the request rate to each site stays
+    under `rate` per second no matter how many workers share the limiter.
+    """
+
+    def __init__(self, rate:float, capacity:float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url:str) -> TokenBucket:
+        domain = urlparse(url).netloc
+        with self.lock:
+            if domain not in self.buckets:
+                self.buckets[domain] = TokenBucket(self.rate, self.capacity)
+            return self.buckets[domain]
+
+    def acquire(self, url:str):
+        """
+        Blocks until a request to the URL's domain is allowed.
+        """
+        self.bucket(url).acquire()
+
+    def set_rate(self, rate:float):
+        """
+        Changes the rate for every domain, including buckets made later.
+        """
+        with self.lock:
+            self.rate = rate
+            buckets = list(self.buckets.values())
+        for bucket in buckets:
+            bucket.set_rate(rate)
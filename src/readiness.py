@@ -0,0 +1,107 @@
+import time
+
+from metrics import record_step
+
+
+def _poll_until_stable(read_value, timeout:float, stable_for:float, interval:float):
+    deadline = time.monotonic() + timeout
+    value = read_value()
+    stable_since = time.monotonic()
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        current = read_value()
+        if current != value:
+            value = current
+            stable_since = time.monotonic()
+        elif time.monotonic() - stable_since >= stable_for:
+            return value
+    return value
+
+
+def wait_for_count_stable(driver, css_selector:str, timeout:float = 10,
+                          stable_for:float = 0.5, interval:float = 0.1) -> int:
+    """
+    Waits until the number of elements matching css_selector stops changing,
+    e.g. the bid list after the Bid History filter is clicked.
+
+    Args:
+        driver: Selenium WebDriver instance
+        css_selector: Elements to count
+        timeout: Maximum wait in seconds
+        stable_for: How long the count must hold still
+        interval: Polling interval in seconds
+
+    Returns:
+        int: The last element count seen
+    """
+    with record_step(f'count_stable:{css_selector}'):
+        return _poll_until_stable(
+            lambda: driver.execute_script(
+                "return document.querySelectorAll(arguments[0]).length;", css_selector),
+            timeout, stable_for, interval,
+        )
+
+
+# [all items, bids] in the comment thread; the bid filter changes one or both
+THREAD_SIGNATURE_JS = """
+const thread = document.querySelectorAll(arguments[0]);
+return [thread.length, document.querySelectorAll(arguments[1]).length];
+"""
+
+
+def click_and_wait_for_bids(driver, button, thread_selector:str = ".thread li",
+                            bid_selector:str = ".thread li.bid", active_selector:str = None,
+                            change_timeout:float = 2, timeout:float = 10,
+                            stable_for:float = 0.5, interval:float = 0.1) -> int:
+    """
+    Clicks a comment-thread filter (e.g. Bid History) and waits for it to
+    take effect: first for the thread to change from what it held before the
+    click, or for active_selector to appear, then for the bid count to hold
+    still. A count that is merely stable is not enough, since the filter's
+    request may not have come back yet.
+
+    If nothing changes within change_timeout seconds (the filter had nothing
+    to hide, or the page never reacted) it carries on after that wait, as
+    the fixed sleep this replaces did.
+
+    Returns:
+        int: The bid count once settled
+    """
+    def signature():
+        return driver.execute_script(THREAD_SIGNATURE_JS, thread_selector, bid_selector)
+
+    def filter_active():
+        return bool(active_selector) and driver.execute_script(
+            "return document.querySelector(arguments[0]) !== null;", active_selector)
+
+    with record_step('bid_filter'):
+        before = signature()
+        driver.execute_script("arguments[0].click();", button)
+
+        deadline = time.monotonic() + change_timeout
+        while signature() == before and not filter_active():
+            if time.monotonic() >= deadline:
+                print("Bid filter did not change the thread, using it as it is")
+                return before[1]
+            time.sleep(interval)
+
+    return wait_for_count_stable(driver, bid_selector, timeout, stable_for, interval)
+
+
+def wait_for_value_change(driver, script:str, old_value, timeout:float = 10,
+                          interval:float = 0.1, step:str = 'value_change'):
+    """
+    Waits until a JS expression returns something other than old_value,
+    e.g. the first auction link on the listing changing after a Next click.
+
+    Returns:
+        The new value, or old_value if it did not change within timeout
+    """
+    with record_step(step):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            value = driver.execute_script(script)
+            if value != old_value:
+                return value
+            time.sleep(interval)
+        return old_value
@@ -0,0 +1,344 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+
+
+class ReserveStatus(str, Enum):
+    RESERVE = 'Reserve'
+    NO_RESERVE = 'No Reserve'
+
+
+class AuctionStatus(str, Enum):
+    SOLD = 'Sold'
+    RESERVE_NOT_MET = 'Reserve Not Met'
+    CANCELED = 'Canceled'
+
+
+# Formats the "Ended" stat has been seen in
+AUCTION_DATE_FORMATS = ['%m/%d/%y', '%m/%d/%Y', '%b %d, %Y', '%B %d, %Y', '%b %d, %Y %I:%M%p', '%Y-%m-%d']
+
+
+def parse_int(value):
+    """
+    Turns '12,500', '$12,500' or '48,000 Miles' into an int; None if there are no digits.
+    """
+    if value is None or isinstance(value, int):
+        return value
+    digits = re.sub(r'[^\d]', '', str(value))
+    return int(digits) if digits else None
+
+
+def parse_auction_date(value:str):
+    """
+    Parses the auction's "Ended" stat into a datetime; None if the format is unknown.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    for date_format in AUCTION_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_iso(value):
+    if not value or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _enum(cls, value):
+    try:
+        return cls(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class Bid:
+    amount: int
+    bidder: str = None
+    time: datetime = None
+    verified: bool = False
+    reputation: str = None
+
+
+@dataclass(slots=True)
+class BidMetrics:
+    unique_bidders: int = 0
+    first_bid_time: datetime = None
+    last_bid_time: datetime = None
+    bids_per_hour: float = None
+    final_minute_bids: int = None
+    final_hour_bids: int = None
+    max_increment: int = None
+    mean_increment: float = None
+
+
+@dataclass(slots=True)
+class QuickFacts:
+    make: str = None
+    model: str = None
+    mileage: int = None
+    mileage_text: str = None    # as shown, e.g. '48,000 Miles (TMU)'
+    vin: str = None
+    title_status: str = None
+    location: str = None
+    seller: str = None
+    engine: str = None
+    drivetrain: str = None
+    transmission: str = None
+    body_style: str = None
+    exterior_color: str = None
+    interior_color: str = None
+    seller_type: str = None
+
+
+@dataclass(slots=True)
+class AuctionRecord:
+    """
+    One scraped auction with numbers, dates and statuses already parsed.
+    Built from the scraper's auction_data dicts with from_legacy.
+    """
+    url: str
+    title: str = None
+    subtitle: str = None
+    reserve_status: ReserveStatus = None
+    auction_status: AuctionStatus = None
+    highest_bid: int = None
+    buyer: str = None
+    seller: str = None
+    bid_count: int = None
+    view_count: int = None
+    watcher_count: int = None
+    ended_at: datetime = None
+    ended_text: str = None      # the "Ended" stat as shown, kept when ended_at cannot parse it
+    bids: list = field(default_factory=list)            # Bid, newest first (page order)
+    bid_metrics: BidMetrics = None
+    quick_facts: QuickFacts = field(default_factory=QuickFacts)
+    dougs_take: str = None
+    highlights_description: str = None
+    highlights: list = field(default_factory=list)
+    known_flaws: list = field(default_factory=list)
+    service_history_description: str = None
+    service_history_items: list = field(default_factory=list)
+    included_items: list = field(default_factory=list)
+    ownership_history: str = None
+    seller_notes: list = field(default_factory=list)
+    videos: list = field(default_factory=list)          # YouTube video IDs
+
+
+# QuickFacts attribute -> auction_quick_facts key; mileage is handled on its own
+QUICK_FACT_KEYS = {
+    'make': 'Make',
+    'model': 'Model',
+    'vin': 'VIN',
+    'title_status': 'Title Status',
+    'location': 'Location',
+    'seller': 'Seller',
+    'engine': 'Engine',
+    'drivetrain': 'Drivetrain',
+    'transmission': 'Transmission',
+    'body_style': 'Body Style',
+    'exterior_color': 'Exterior Color',
+    'interior_color': 'Interior Color',
+    'seller_type': 'Seller Type',
+}
+
+
+def from_legacy(auction_data:dict) -> AuctionRecord:
+    """
+    Converts an auction_data dict (see scrape_auction.new_auction_data) into
+    an AuctionRecord. Auctions scraped before bid history was kept only have
+    bid amounts; those become Bids without bidder or time.
+    """
+    stats = auction_data.get('auction_stats') or {}
+    quick_facts = auction_data.get('auction_quick_facts') or {}
+    highlights = auction_data.get('auction_highlights') or {}
+    service = auction_data.get('service_history') or {}
+
+    history = stats.get('bid_history')
+    if history:
+        bids = [Bid(bid['amount'], bid.get('bidder'), _parse_iso(bid.get('time')),
+                    bool(bid.get('verified')), bid.get('reputation')) for bid in history]
+    else:
+        bids = [Bid(amount) for amount in map(parse_int, stats.get('bids') or []) if amount is not None]
+
+    metrics = stats.get('bid_metrics')
+    if metrics:
+        metrics = BidMetrics(**{**metrics,
+                                'first_bid_time': _parse_iso(metrics.get('first_bid_time')),
+                                'last_bid_time': _parse_iso(metrics.get('last_bid_time'))})
+
+    facts = QuickFacts(mileage=parse_int(quick_facts.get('Mileage')), mileage_text=quick_facts.get('Mileage'),
+                       **{name: quick_facts.get(key) for name, key in QUICK_FACT_KEYS.items()})
+
+    return AuctionRecord(
+        url=auction_data.get('auction_url'),
+        title=auction_data.get('auction_title'),
+        subtitle=auction_data.get('auction_subtitle'),
+        reserve_status=_enum(ReserveStatus, stats.get('reserve_status')),
+        auction_status=_enum(AuctionStatus, stats.get('auction_status')),
+        highest_bid=parse_int(stats.get('highest_bid_value')),
+        buyer=stats.get('buyer_username'),
+        seller=stats.get('seller_username'),
+        bid_count=stats.get('bid_count'),
+        view_count=stats.get('view_count'),
+        watcher_count=stats.get('watcher_count'),
+        ended_at=parse_auction_date(stats.get('auction_date')),
+        ended_text=stats.get('auction_date'),
+        bids=bids,
+        bid_metrics=metrics or None,
+        quick_facts=facts,
+        dougs_take=auction_data.get('dougs_take'),
+        highlights_description=highlights.get('description'),
+        highlights=highlights.get('bullet_points') or [],
+        known_flaws=auction_data.get('known_flaws') or [],
+        service_history_description=service.get('description'),
+        service_history_items=service.get('items') or [],
+        included_items=auction_data.get('included_items') or [],
+        ownership_history=auction_data.get('ownership_history'),
+        seller_notes=auction_data.get('seller_notes') or [],
+        videos=auction_data.get('auction_videos') or [],
+    )
+
+
+def _bid_dict(bid:Bid) -> dict:
+    return {'amount': bid.amount, 'bidder': bid.bidder, 'time': _iso(bid.time),
+            'verified': bid.verified, 'reputation': bid.reputation}
+
+
+def _metrics_dict(metrics:BidMetrics) -> dict:
+    return {
+        'unique_bidders': metrics.unique_bidders,
+        'first_bid_time': _iso(metrics.first_bid_time),
+        'last_bid_time': _iso(metrics.last_bid_time),
+        'bids_per_hour': metrics.bids_per_hour,
+        'final_minute_bids': metrics.final_minute_bids,
+        'final_hour_bids': metrics.final_hour_bids,
+        'max_increment': metrics.max_increment,
+        'mean_increment': metrics.mean_increment,
+    }
+
+
+def to_dict(record:AuctionRecord) -> dict:
+    """
+    JSON-ready dict of a record: enums as their values, datetimes as ISO
+    strings. Built field by field, much faster than dataclasses.asdict.
+    """
+    data = {name: getattr(record, name) for name in AuctionRecord.__slots__}
+    data['reserve_status'] = record.reserve_status.value if record.reserve_status else None
+    data['auction_status'] = record.auction_status.value if record.auction_status else None
+    data['ended_at'] = _iso(record.ended_at)
+    data['bids'] = [_bid_dict(bid) for bid in record.bids]
+    data['bid_metrics'] = _metrics_dict(record.bid_metrics) if record.bid_metrics else None
+    data['quick_facts'] = {name: getattr(record.quick_facts, name) for name in QuickFacts.__slots__}
+    return data
+
+
+def from_dict(data:dict) -> AuctionRecord:
+    """
+    Inverse of to_dict.
+    """
+    data = dict(data)
+    data['reserve_status'] = _enum(ReserveStatus, data.get('reserve_status'))
+    data['auction_status'] = _enum(AuctionStatus, data.get('auction_status'))
+    data['ended_at'] = _parse_iso(data.get('ended_at'))
+    data['bids'] = [Bid(**{**bid, 'time': _parse_iso(bid.get('time'))}) for bid in data.get('bids') or []]
+    metrics = data.get('bid_metrics')
+    if metrics:
+        data['bid_metrics'] = BidMetrics(**{**metrics,
+                                            'first_bid_time': _parse_iso(metrics.get('first_bid_time')),
+                                            'last_bid_time': _parse_iso(metrics.get('last_bid_time'))})
+    data['quick_facts'] = QuickFacts(**(data.get('quick_facts') or {}))
+    return AuctionRecord(**data)
+
+
+def to_json(record:AuctionRecord) -> str:
+    return json.dumps(to_dict(record), separators=(',', ':'))
+
+
+def write_jsonl(records, path:str) -> int:
+    """
+    Writes records to a JSON Lines file, one to_dict per line.
+
+    Returns:
+        int: Number of records written
+    """
+    count = 0
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        for record in records:
+            f.write(to_json(record) + '\n')
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_jsonl(path:str):
+    """
+    Yields AuctionRecords from a JSON Lines file of either records (to_dict)
+    or the scraper's auction_data dicts.
+    """
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            yield from_legacy(data) if 'auction_stats' in data else from_dict(data)
+
+
+def to_row(record:AuctionRecord) -> dict:
+    """
+    Flat row for the Parquet schema in parquet_output.auction_schema.
+    """
+    facts = record.quick_facts
+    metrics = _metrics_dict(record.bid_metrics) if record.bid_metrics else {}
+    row = {
+        'auction_url': record.url,
+        'auction_title': record.title,
+        'auction_subtitle': record.subtitle,
+        'reserve_status': record.reserve_status.value if record.reserve_status else None,
+        'auction_status': record.auction_status.value if record.auction_status else None,
+        'highest_bid_value': record.highest_bid,
+        'buyer_username': record.buyer,
+        'seller_username': record.seller,
+        'bid_count': record.bid_count,
+        'view_count': record.view_count,
+        'watcher_count': record.watcher_count,
+        'auction_date': record.ended_at,
+        'auction_date_raw': record.ended_text,
+        'bids': [bid.amount for bid in record.bids],
+        'bid_history': [_bid_dict(bid) for bid in record.bids],
+    }
+    for name in BidMetrics.__slots__:
+        row[name] = metrics.get(name)
+    for name in QUICK_FACT_KEYS:
+        row[name] = getattr(facts, name)
+    row['mileage'] = facts.mileage_text
+    row['mileage_value'] = facts.mileage
+    row.update({
+        'dougs_take': record.dougs_take,
+        'highlights_description': record.highlights_description,
+        'highlights': record.highlights,
+        'known_flaws': record.known_flaws,
+        'service_history_description': record.service_history_description,
+        'service_history_items': record.service_history_items,
+        'included_items': record.included_items,
+        'ownership_history': record.ownership_history,
+        'seller_notes': record.seller_notes,
+        'auction_videos': record.videos,
+    })
+    return row
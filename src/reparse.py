@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import archive
+import parse_html
+
+
+def _reparse_entry(args):
+    entry, archive_dir, parser = args
+    html = archive.load_page(entry, archive_dir)
+    return parse_html.parse_auction_html(html, entry['url'], parser)
+
+
+def reparse_archive(archive_dir:str = archive.ARCHIVE_DIR, urls:list = None,
+                    parser:str = None, workers:int = None) -> list:
+    """
+    Regenerates auction_data dicts from archived pages without refetching.
+
+    Args:
+        archive_dir: Root folder of the HTML archive
+        urls: Only reparse these URLs (default: everything archived)
+        parser: Parser backend name, see parse_html.select_parser
+        workers: Number of parser processes (default: CPU count)
+
+    Returns:
+        list: auction_data dicts, one per archived URL
+    """
+    entries = archive.read_index(archive_dir)
+    if urls is not None:
+        wanted = set(urls)
+        entries = [entry for entry in entries if entry['url'] in wanted]
+
+    jobs = [(entry, archive_dir, parser) for entry in entries]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_reparse_entry, jobs, chunksize=32))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Rebuild scraped JSON from the HTML archive")
+    arg_parser.add_argument("--archive-dir", default=archive.ARCHIVE_DIR)
+    arg_parser.add_argument("--s3", action="store_true",
+                            help=f"first fetch the archive from S3 (under {archive.S3_PREFIX}/) into --archive-dir")
+    arg_parser.add_argument("--urls", help="file with one auction URL per line to restrict the reparse")
+    arg_parser.add_argument("--parser", help="HTML parser backend (lxml or bs4)")
+    arg_parser.add_argument("--workers", type=int)
+    arg_parser.add_argument("--output", help="output JSON file (default: reparsed_results_<ts>.json)")
+    args = arg_parser.parse_args()
+
+    urls = None
+    if args.urls:
+        with open(args.urls, "r") as file:
+            urls = [url.strip() for url in file if url.strip()]
+
+    if args.s3:
+        downloaded = archive.download_archive(args.archive_dir, urls=urls)
+        print(f"Fetched {downloaded} archived pages from S3")
+
+    start = time.perf_counter()
+    results = reparse_archive(args.archive_dir, urls, args.parser, args.workers)
+    elapsed = time.perf_counter() - start
+
+    output_file = args.output or f"reparsed_results_{int(time.time())}.json"
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=3)
+
+    print(f"✅ Reparsed {len(results)} auctions in {elapsed:.1f}s -> {os.path.abspath(output_file)}")
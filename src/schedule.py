@@ -0,0 +1,144 @@
+import csv
+import os
+from datetime import date, datetime, timedelta, timezone
+
+
+# Priority tiers, scraped in this order
+NEVER_SCRAPED = 0   # listed but never scraped
+SETTLING = 1        # ended recently and last scraped before its final stats could settle
+STALE = 2           # last scrape too old, or it failed
+FRESH = 3           # scraped recently enough; only worth it if there is time left
+
+TIER_NAMES = {NEVER_SCRAPED: 'never_scraped', SETTLING: 'settling', STALE: 'stale', FRESH: 'fresh'}
+
+
+def _date(value):
+    # 'YYYY-MM-DD' or a full ISO timestamp -> date
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def read_listing_dates(filename:str = 'auction_urls.csv') -> dict:
+    """
+    URL -> date it was listed, from the CSV kept by
+    scrape_auction_urls.save_auction_urls_to_csv. Past auctions are listed
+    as they end, so this is close to the auction's end date.
+    """
+    if not filename or not os.path.exists(filename):
+        return {}
+    with open(filename, 'r', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Skip header
+        return {row[0]: row[1] for row in reader if len(row) > 1}
+
+
+def url_rows(urls:list, store=None, listing_dates:dict = None) -> list:
+    """
+    (url, first_seen, last_scraped, status) for each URL, from the URL store
+    where it has the URL. first_seen is the listing CSV date whenever there
+    is one: the store's first_seen is the scrape date for URLs it learnt
+    about from a scrape (see UrlStore.mark_scraped), not when they were listed.
+    """
+    stored = {row[0]: row for row in store.rows()} if store is not None else {}
+    listing_dates = listing_dates or {}
+    rows = []
+    for url in urls:
+        url, first_seen, last_scraped, status = stored.get(url) or (url, None, None, 'new')
+        rows.append((url, listing_dates.get(url, first_seen), last_scraped, status))
+    return rows
+
+
+def tier(first_seen:str, last_scraped:str, status:str, today:date,
+         settle_days:int = 7, stale_days:int = 30) -> int:
+    """
+    Priority tier of one URL, see NEVER_SCRAPED .. FRESH.
+    """
+    if not last_scraped:
+        return NEVER_SCRAPED
+    listed, scraped = _date(first_seen), _date(last_scraped)
+    # at most once a day while settling
+    if (listed is not None and scraped is not None and today - listed <= timedelta(days=settle_days)
+            and scraped < min(today, listed + timedelta(days=settle_days))):
+        return SETTLING
+    if status != 'ok' or scraped is None or today - scraped > timedelta(days=stale_days):
+        return STALE
+    return FRESH
+
+
+def prioritise(rows:list, settle_days:int = 7, stale_days:int = 30, today:date = None,
+               include_fresh:bool = True) -> list:
+    """
+    Orders URLs by scraping value: never scraped (oldest listing first), then
+    settling (most recently listed first), then stale (least recently scraped
+    first), then fresh.
+
+    Args:
+        rows: (url, first_seen, last_scraped, status) tuples, e.g. url_rows()
+        settle_days: Days after listing during which an auction's final stats may still change
+        stale_days: Age after which a scrape is stale
+        today: Defaults to the current UTC date
+        include_fresh: Keep URLs that do not need scraping at the end of the list
+
+    Returns:
+        list: (tier, url) pairs in scraping order
+    """
+    today = today or datetime.now(timezone.utc).date()
+    tiers = {NEVER_SCRAPED: [], SETTLING: [], STALE: [], FRESH: []}
+    for url, first_seen, last_scraped, status in rows:
+        tiers[tier(first_seen, last_scraped, status, today, settle_days, stale_days)].append(
+            (url, first_seen or '', last_scraped or ''))
+
+    ordered = sorted(tiers[NEVER_SCRAPED], key=lambda row: row[1])
+    ordered += sorted(tiers[SETTLING], key=lambda row: row[1], reverse=True)
+    ordered += sorted(tiers[STALE], key=lambda row: row[2])
+    if include_fresh:
+        ordered += sorted(tiers[FRESH], key=lambda row: row[2])
+
+    tier_of = {url: number for number, entries in tiers.items() for url, _, _ in entries}
+    return [(tier_of[url], url) for url, _, _ in ordered]
+
+
+def tier_counts(scheduled:list) -> dict:
+    """
+    How many scheduled URLs fall in each tier, by tier name.
+    """
+    counts = {name: 0 for name in TIER_NAMES.values()}
+    for number, _ in scheduled:
+        counts[TIER_NAMES[number]] += 1
+    return counts
+
+
+def write_queue(urls:list, filename:str):
+    """
+    Writes URLs left for a later run, one per line (usable as --urls).
+    """
+    tmp_path = filename + '.tmp'
+    with open(tmp_path, 'w') as f:
+        for url in urls:
+            f.write(url + '\n')
+    os.replace(tmp_path, filename)
+
+
+def read_queue(filename:str) -> list:
+    """
+    URLs written by write_queue; empty if there is no queue file.
+    """
+    if not filename or not os.path.exists(filename):
+        return []
+    with open(filename, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def queued_first(urls:list, queued:list) -> list:
+    """
+    Moves the URLs an earlier run left queued to the front, in queue order.
+    Queued URLs that are no longer in urls are dropped.
+    """
+    wanted = set(urls)
+    front = [url for url in dict.fromkeys(queued) if url in wanted]
+    moved = set(front)
+    return front + [url for url in urls if url not in moved]
@@ -2,7 +2,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 import csv
 from datetime import datetime
 import os
@@ -10,24 +9,19 @@ import json
 
 
 from driver_setup import close_promo_bar
+from readiness import click_and_wait_for_bids
+from metrics import record_step, SectionTimer
+from bids import BID_RECORDS_JS, parse_bid_records, bid_metrics
 
+# The Bid History filter button once it is the selected filter
+BID_FILTER_ACTIVE = "button[data-filter='4'][data-ga='bids'].active"
 
-def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
+
+def new_auction_data(url:str) -> dict:
     """
-    Scrapes detailed information from a single auction page.
-    
-    Args:
-        url: URL of the auction page
-        driver: Selenium WebDriver instance
-        timeout: Maximum wait time for elements
-        
-    Returns:
-        Dictionary containing all scraped auction details
+    Builds an empty auction_data dict for the given URL.
     """
-    driver.get(url)
-    close_promo_bar(driver)
-
-    auction_data = {
+    return {
         'auction_url': url,
         'auction_title': None,
         'auction_subtitle': None,
@@ -41,8 +35,9 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
             'view_count': None,
             'watcher_count': None,
             'auction_date': None,
-            'bids':[]
-            
+            'bids':[],
+            'bid_history': [],
+            'bid_metrics': None
         },
         'auction_quick_facts': {
             'Make': None,
@@ -76,11 +71,55 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
         'auction_videos': []
     }
 
+
+def set_bid_history(auction_data:dict, bid_records:list) -> dict:
+    """
+    Fills bids, bid_history and bid_metrics from raw bid records
+    (see bids.BID_RECORDS_JS).
+    """
+    history = parse_bid_records(bid_records)
+    stats = auction_data['auction_stats']
+    stats['bids'] = [str(bid['amount']) for bid in history]
+    stats['bid_history'] = history
+    stats['bid_metrics'] = bid_metrics(history)
+    return auction_data
+
+
+def _reserve_status(text:str) -> str:
+    # "No Reserve" contains "Reserve", so it has to be checked first
+    return 'Reserve' if 'Reserve' in text and 'No Reserve' not in text else 'No Reserve'
+
+
+def scrape_auction_data(driver, url:str, timeout:int = 30, use_snapshot:bool = False) -> dict:
+    """
+    Scrapes detailed information from a single auction page.
+    
+    Args:
+        url: URL of the auction page
+        driver: Selenium WebDriver instance
+        timeout: Maximum wait time for elements
+        use_snapshot: Read the rendered page in a single execute_script call
+            instead of one WebDriver call per field and bid
+        
+    Returns:
+        Dictionary containing all scraped auction details
+    """
+    with record_step('page_load'):
+        driver.get(url)
+    close_promo_bar(driver)
+
+    auction_data = new_auction_data(url)
+
+    if use_snapshot:
+        return scrape_auction_snapshot(driver, auction_data, timeout)
+
+    sections = SectionTimer('extract')
     try:
         # Wait for main content to load
         WebDriverWait(driver, timeout).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, ".auction-title"))
         )
+        sections.lap('wait_title')
         # Extract title
         title_element = driver.find_element(By.CSS_SELECTOR, ".auction-title h1")
         auction_data['auction_title'] = title_element.text.strip()
@@ -91,7 +130,7 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
         
         # Extract reserve status
         reserve_element = driver.find_element(By.CSS_SELECTOR, "#auction-jump h3 span")
-        auction_data['auction_stats']['reserve_status'] = 'Reserve' if 'Reserve' in reserve_element.text else 'No Reserve'
+        auction_data['auction_stats']['reserve_status'] = _reserve_status(reserve_element.text)
         
         # Extract auction status and final bid
         status_container = driver.find_element(By.CSS_SELECTOR, ".current-bid.ended")
@@ -110,6 +149,8 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
             bid_value = status_container.find_element(By.CSS_SELECTOR, ".bid-value").text
             auction_data['auction_stats']['highest_bid_value'] = bid_value.replace('$', '').strip()
 
+        sections.lap('header')
+
         # Extract statistics from the stats ul
         stats_section = driver.find_element(By.CSS_SELECTOR, "ul.stats")
         
@@ -132,6 +173,8 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
             elif label == "Watching":
                 auction_data['auction_stats']['watcher_count'] = int(value.replace(',', ''))
 
+        sections.lap('stats')
+
         # Process auction quick facts
         # Wait for quick facts section to load
         try:
@@ -191,6 +234,8 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
             print(e)
             pass
 
+        sections.lap('quick_facts')
+
         # Extract Doug's Take
         try:
             dougs_section = driver.find_element(By.CSS_SELECTOR, ".detail-section.dougs-take")
@@ -276,6 +321,8 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
         except NoSuchElementException:
             print('Auction videos not found')
 
+        sections.lap('details')
+
         # bids
         try:
             # Wait for main content and click Bid History button
@@ -288,31 +335,14 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
                 bid_button = WebDriverWait(driver, 10).until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-filter='4'][data-ga='bids']"))
                 )
-                driver.execute_script("arguments[0].click();", bid_button)
-                time.sleep(2)  # Allow bids to load
+                click_and_wait_for_bids(driver, bid_button, active_selector=BID_FILTER_ACTIVE)
             except Exception as e:
                 print(f"Couldn't click bid history button: {str(e)}")
                 return auction_data
 
-            # Extract bid history
-            bids = []
-            bid_items = driver.find_elements(By.CSS_SELECTOR, ".thread li.bid")
-            for bid in bid_items:
-                try:
-                    bid = bid.find_element(By.CSS_SELECTOR, ".bid-value").text.replace('$', '').replace(',', '')
-                    bids.append(bid)
-                    # bid_data = {
-                    #     # 'bidder': bid.find_element(By.CSS_SELECTOR, ".user").text.strip(),
-                        
-                    #     # 'time': bid.find_element(By.CSS_SELECTOR, ".time").get_attribute("data-full"),
-                    #     # 'is_verified': bool(bid.find_elements(By.CSS_SELECTOR, ".verified")),
-                    #     # 'reputation': bid.find_element(By.CSS_SELECTOR, ".rep").text.replace('Reputation Icon', '').strip()
-                    # }
-                   
-                except Exception as e:
-                    print(f"Error parsing bid: {str(e)}")
-                    continue
-            auction_data['auction_stats']['bids']=bids
+            # Extract bid history in one call rather than several per bid
+            set_bid_history(auction_data, driver.execute_script(f"return {BID_RECORDS_JS};"))
+            sections.lap('bid_history')
 
         except Exception as e:
             print(f"Error scraping bid history: {str(e)}")
@@ -323,3 +353,260 @@ def scrape_auction_data(driver, url:str, timeout:int = 30) -> dict:
         print(f"Error scraping {url}: {str(e)}")
     
     return auction_data
+
+
+# Collects every field scrape_auction_data reads into one plain object so the
+# whole page costs a single WebDriver round trip. Missing sections come back
+# as null and are reported by parse_auction_snapshot.
+AUCTION_SNAPSHOT_JS = r"""
+const text = (root, sel) => {
+    const el = root ? (sel ? root.querySelector(sel) : root) : null;
+    return el ? el.innerText.trim() : null;
+};
+const texts = (root, sel) => root
+    ? Array.from(root.querySelectorAll(sel), el => el.innerText.trim())
+    : null;
+const section = name => document.querySelector('.detail-section.' + name);
+
+const status = document.querySelector('.current-bid.ended');
+const stats = document.querySelector('ul.stats');
+const highlights = section('detail-highlights');
+const highlightsBody = highlights ? highlights.querySelector('.detail-body') : null;
+const service = section('detail-recent_service_history');
+const videos = section('detail-videos');
+const quickFacts = document.querySelector('.quick-facts');
+
+return {
+    title: text(document, '.auction-title h1'),
+    subtitle: text(document, '.d-md-flex.justify-content-between.flex-wrap h2'),
+    reserve: text(document, '#auction-jump h3 span'),
+    status: status ? {
+        cancelled: status.classList.contains('cancelled'),
+        header: text(status, 'h4'),
+        buyer: text(status, '.username .user'),
+        bid_value: text(status, '.bid-value')
+    } : null,
+    seller: text(stats, 'li.seller .user'),
+    stats: stats ? Array.from(stats.querySelectorAll('li:not(.seller)'), li => [
+        text(li, '.th'), text(li, '.td')
+    ]) : null,
+    quick_facts: quickFacts ? Array.from(quickFacts.querySelectorAll('dl'), dl =>
+        Array.from(dl.querySelectorAll('dt'), dt => {
+            let dd = dt.nextElementSibling;
+            while (dd && dd.tagName !== 'DD') dd = dd.nextElementSibling;
+            return {
+                label: dt.innerText.trim(),
+                text: text(dd),
+                link: text(dd, 'a'),
+                user: text(dd, '.user')
+            };
+        })
+    ) : null,
+    dougs_take: text(section('dougs-take'), '.detail-body p'),
+    highlights: highlightsBody ? {
+        description: text(highlightsBody, 'p'),
+        bullet_points: texts(highlightsBody, 'ul li')
+    } : null,
+    known_flaws: texts(section('detail-known_flaws'), '.detail-body li'),
+    service_history: service ? {
+        description: text(service, '.detail-body p'),
+        items: texts(service, '.detail-body li')
+    } : null,
+    included_items: texts(section('detail-other_items'), '.detail-body li'),
+    ownership_history: text(section('detail-ownership_history'), '.detail-body p'),
+    seller_notes: texts(section('detail-seller_notes'), '.detail-body li'),
+    videos: videos
+        ? Array.from(videos.querySelectorAll('.video-embed img.video-preview'), img => img.src)
+        : null,
+    bid_records: __BID_RECORDS__
+};
+""".replace('__BID_RECORDS__', BID_RECORDS_JS)
+
+# Quick fact label (as normalised by scrape_auction_data) -> (dict key, source)
+# where source picks the dd text, its link text or its .user text.
+QUICK_FACT_FIELDS = {
+    'make': ('Make', 'link'),
+    'model': ('Model', 'link'),
+    'mileage': ('Mileage', 'text'),
+    'vin': ('VIN', 'text'),
+    'title_status': ('Title Status', 'text'),
+    'location': ('Location', 'text'),
+    'seller': ('Seller', 'user'),
+    'engine': ('Engine', 'text'),
+    'drivetrain': ('Drivetrain', 'text'),
+    'transmission': ('Transmission', 'text'),
+    'body_style': ('Body Style', 'text'),
+    'exterior_color': ('Exterior Color', 'text'),
+    'interior_color': ('Interior Color', 'text'),
+    'seller_type': ('Seller Type', 'text'),
+}
+
+
+def show_bid_history(driver, timeout:int = 30):
+    """
+    Waits for the loaded auction page to render and switches its comment
+    thread to the bid history filter, so the page holds every bid.
+
+    Raises:
+        TimeoutException: if the auction title never appears
+    """
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, ".auction-title"))
+    )
+
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".comments"))
+        )
+        bid_button = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-filter='4'][data-ga='bids']"))
+        )
+        click_and_wait_for_bids(driver, bid_button, active_selector=BID_FILTER_ACTIVE)
+    except Exception as e:
+        print(f"Couldn't click bid history button: {str(e)}")
+
+
+def scrape_auction_snapshot(driver, auction_data:dict, timeout:int = 30) -> dict:
+    """
+    Fills auction_data from a single AUCTION_SNAPSHOT_JS call on the already
+    loaded auction page. The bid history filter is clicked first so the
+    snapshot includes the bids.
+
+    Args:
+        driver: Selenium WebDriver instance
+        auction_data: Dictionary from new_auction_data to fill in
+        timeout: Maximum wait time for elements
+
+    Returns:
+        Dictionary containing all scraped auction details
+    """
+    url = auction_data['auction_url']
+    try:
+        with record_step('bid_history'):
+            show_bid_history(driver, timeout)
+        with record_step('extract:snapshot'):
+            snapshot = driver.execute_script(AUCTION_SNAPSHOT_JS)
+        parse_auction_snapshot(auction_data, snapshot)
+
+    except TimeoutException:
+        print(f"Timeout while scraping {url}")
+    except Exception as e:
+        print(f"Error scraping {url}: {str(e)}")
+
+    return auction_data
+
+
+def parse_auction_snapshot(auction_data:dict, snapshot:dict) -> dict:
+    """
+    Maps the object returned by AUCTION_SNAPSHOT_JS onto auction_data,
+    applying the same cleaning as the per-element scraper.
+
+    Args:
+        auction_data: Dictionary from new_auction_data to fill in
+        snapshot: Page snapshot returned by AUCTION_SNAPSHOT_JS
+
+    Returns:
+        The filled auction_data dictionary
+    """
+    stats = auction_data['auction_stats']
+
+    auction_data['auction_title'] = snapshot.get('title')
+    auction_data['auction_subtitle'] = snapshot.get('subtitle')
+
+    reserve = snapshot.get('reserve')
+    if reserve is not None:
+        stats['reserve_status'] = _reserve_status(reserve)
+
+    status = snapshot.get('status')
+    if status:
+        if status['cancelled']:
+            stats['auction_status'] = 'Canceled'
+        else:
+            status_header = status.get('header') or ''
+            if 'Sold to' in status_header:
+                stats['auction_status'] = 'Sold'
+                stats['buyer_username'] = status.get('buyer')
+            elif 'Reserve not met' in status_header:
+                stats['auction_status'] = 'Reserve Not Met'
+
+            if status.get('bid_value') is not None:
+                stats['highest_bid_value'] = status['bid_value'].replace('$', '').strip()
+
+    stats['seller_username'] = snapshot.get('seller')
+
+    for label, value in snapshot.get('stats') or []:
+        if label is None or value is None:
+            continue
+        if label == "Ended":
+            stats['auction_date'] = value
+        elif label == "Bids":
+            stats['bid_count'] = int(value.replace(',', ''))
+        elif label == "Views":
+            stats['view_count'] = int(value.replace(',', ''))
+        elif label == "Watching":
+            stats['watcher_count'] = int(value.replace(',', ''))
+
+    quick_facts = snapshot.get('quick_facts')
+    if quick_facts is None:
+        print('Auction quick facts not found')
+    else:
+        for dl in quick_facts[:2]:
+            for fact in dl:
+                label = fact['label'].lower().replace(" ", "_")
+                if label in QUICK_FACT_FIELDS:
+                    key, source = QUICK_FACT_FIELDS[label]
+                    auction_data['auction_quick_facts'][key] = fact.get(source)
+
+    if snapshot.get('dougs_take') is None:
+        print("Doug's take not found")
+    else:
+        auction_data['dougs_take'] = snapshot['dougs_take']
+
+    highlights = snapshot.get('highlights')
+    if highlights is None:
+        print('Auction highlights not found')
+    else:
+        auction_data['auction_highlights']['description'] = highlights.get('description')
+        auction_data['auction_highlights']['bullet_points'] = [
+            point for point in highlights.get('bullet_points') or [] if point
+        ]
+
+    if snapshot.get('known_flaws') is None:
+        print('Known flaws not found')
+    else:
+        auction_data['known_flaws'] = snapshot['known_flaws']
+
+    service = snapshot.get('service_history')
+    if service is None:
+        print('Service History not found')
+    else:
+        auction_data['service_history']['description'] = service.get('description')
+        auction_data['service_history']['items'] = service.get('items') or []
+
+    if snapshot.get('included_items') is None:
+        print("Included items not found")
+    else:
+        auction_data['included_items'] = snapshot['included_items']
+
+    if snapshot.get('ownership_history') is None:
+        print('Ownership history not found')
+    else:
+        auction_data['ownership_history'] = snapshot['ownership_history']
+
+    if snapshot.get('seller_notes') is None:
+        print('Seller notes not found')
+    else:
+        auction_data['seller_notes'] = snapshot['seller_notes']
+
+    if snapshot.get('videos') is None:
+        print('Auction videos not found')
+    else:
+        auction_data['auction_videos'] = [
+            src.split('/vi/')[1].split('/')[0]
+            for src in snapshot['videos']
+            if src and 'ytimg.com' in src
+        ]
+
+    set_bid_history(auction_data, snapshot.get('bid_records'))
+
+    return auction_data
@@ -2,13 +2,22 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 import csv
 from datetime import datetime
 import os
 
 
 from driver_setup import close_promo_bar
+from readiness import wait_for_value_change
+
+
+LISTING_URL = 'https://carsandbids.com/past-auctions/'
+
+# href of the first auction on the listing, used to tell when the next page has rendered
+FIRST_AUCTION_HREF_JS = (
+    "const link = document.querySelector('.auction-item .auction-title a[href]');"
+    "return link ? link.href : null;"
+)
 
 
 def wait_for_pagination(driver, timeout:int=10):
@@ -21,7 +30,29 @@ def wait_for_pagination(driver, timeout:int=10):
         print("⚠️ Pagination not found. Proceeding anyway...")
 
 
-def extract_auction_urls(driver, max_pages:int=None, timeout:int=30):
+def load_known_urls(filename="auction_urls.csv"):
+    """
+    Loads the URLs already saved by save_auction_urls_to_csv or
+    save_auction_urls_locally, for incremental crawls.
+
+    Args:
+        filename (str): .csv (url in the first column) or one-URL-per-line file
+    Returns:
+        set: Known auction URLs (empty if the file does not exist).
+    """
+    if not os.path.exists(filename):
+        return set()
+
+    with open(filename, 'r', newline='') as f:
+        if filename.endswith('.csv'):
+            reader = csv.reader(f)
+            next(reader, None)  # Skip header
+            return {row[0] for row in reader if row}
+        return set(line.strip() for line in f if line.strip())
+
+
+def extract_auction_urls(driver, max_pages:int=None, timeout:int=30,
+                         known_urls:set=None, overlap_pages:int=1, start_url:str=LISTING_URL):
     """
     Scrapes auction URLs from carsandbids.com/past-auctions/.
     
@@ -29,15 +60,20 @@ def extract_auction_urls(driver, max_pages:int=None, timeout:int=30):
         driver: Selenium WebDriver instance.
         max_pages (int): Max number of pages to scrape. If None, scrape all.
         timeout (int): Timeout for WebDriverWait.
+        known_urls (set): Already stored URLs (see load_known_urls). When given,
+            the crawl stops once pages contain nothing new.
+        overlap_pages (int): Consecutive all-known pages to read before stopping.
+        start_url (str): First listing page (e.g. a local replay of it).
     Returns:
         list: All scraped auction URLs.
     """
-    driver.get('https://carsandbids.com/past-auctions/')
+    driver.get(start_url)
     close_promo_bar(driver)
 
 
     auction_urls = []
     current_page = 1
+    known_pages = 0
 
     while True:
         print(f"Scraping page {current_page}...")
@@ -50,7 +86,8 @@ def extract_auction_urls(driver, max_pages:int=None, timeout:int=30):
 
             # extract urls from  current page
             auction_links = driver.find_elements(By.CSS_SELECTOR, ".auction-item .auction-title a[href]")
-            auction_urls.extend([link.get_attribute("href") for link in auction_links])
+            page_urls = [link.get_attribute("href") for link in auction_links]
+            auction_urls.extend(page_urls)
             print(f"✅ Added {len(auction_links)} URLs (Total: {len(auction_urls)})")
 
 
@@ -62,6 +99,16 @@ def extract_auction_urls(driver, max_pages:int=None, timeout:int=30):
             print(e)
             break
 
+        # listing is newest first, so pages of known URLs mean the rest is known too
+        if known_urls is not None:
+            if all(url in known_urls for url in page_urls):
+                known_pages += 1
+                if known_pages >= overlap_pages:
+                    print(f"⏩ {known_pages} page(s) with no new URLs. Stopping.")
+                    break
+            else:
+                known_pages = 0
+
         # check if it has scraped max_pages
         if max_pages and current_page >= max_pages:
             print(f"Reached max pages ({max_pages}). Stopping.")
@@ -72,9 +119,10 @@ def extract_auction_urls(driver, max_pages:int=None, timeout:int=30):
             next_button = WebDriverWait(driver, timeout).until(
                 EC.element_to_be_clickable((By.CSS_SELECTOR, "li.arrow.next button"))
             )
+            first_href = driver.execute_script(FIRST_AUCTION_HREF_JS)
             next_button.click()
             current_page += 1
-            time.sleep(5)
+            wait_for_value_change(driver, FIRST_AUCTION_HREF_JS, first_href, timeout=timeout, step='next_page')
         except TimeoutException:
             print("⚠️ No more pages (or pagination button not clickable).")
             break
@@ -90,24 +138,41 @@ def extract_auction_urls(driver, max_pages:int=None, timeout:int=30):
 
 
 
-def save_auction_urls_locally(auction_urls, filename="auction_urls.txt"):
+def _new_urls_in_store(auction_urls, store, filename):
+    # a new store starts from the URLs already in the file, else every one would look new
+    if len(store) == 0:
+        store.import_file(filename)
+    # O(1) index lookups instead of rereading the whole URL file
+    new_urls = [url for url in dict.fromkeys(auction_urls) if url not in store]
+    store.add_urls(new_urls)
+    return new_urls
+
+
+def save_auction_urls_locally(auction_urls, filename="auction_urls.txt", store=None):
     """
     Saves auction URLs to a local file, skipping duplicates.
     
     Args:
         auction_urls (list): List of URLs to save.
         filename (str): File to store URLs (one per line).
+        store (UrlStore): Optional URL index used for the duplicate check
+            instead of reading the whole file. An empty store is filled
+            from the file first.
     """
     try:
-        # Read existing URLs (if file exists)
-        try:
-            with open(filename, 'r') as f:
-                existing_urls = set(line.strip() for line in f if line.strip())
-        except FileNotFoundError:
-            pass
-
-        # Append only new URLs
-        new_urls =[url for url in auction_urls if url not in existing_urls]
+        if store is not None:
+            new_urls = _new_urls_in_store(auction_urls, store, filename)
+        else:
+            # Read existing URLs (if file exists)
+            existing_urls = set()
+            try:
+                with open(filename, 'r') as f:
+                    existing_urls = set(line.strip() for line in f if line.strip())
+            except FileNotFoundError:
+                pass
+
+            # Append only new URLs
+            new_urls =[url for url in auction_urls if url not in existing_urls]
         
         if new_urls:
             with open(filename, 'a') as f:  # 'a' mode = append without overwriting
@@ -121,7 +186,7 @@ def save_auction_urls_locally(auction_urls, filename="auction_urls.txt"):
         print(f"❌ Error saving URLs: {e}")
 
 
-def save_auction_urls_to_csv(auction_urls, filename="auction_urls.csv"):
+def save_auction_urls_to_csv(auction_urls, filename="auction_urls.csv", store=None):
     """
     Saves auction URLs to CSV with scraping date.
     Only adds new URLs that don't already exist in the file.
@@ -129,24 +194,30 @@ def save_auction_urls_to_csv(auction_urls, filename="auction_urls.csv"):
     Args:
         auction_urls (list): List of URLs to save
         filename (str): CSV file path (default: auction_urls.csv)
+        store (UrlStore): Optional URL index used for the duplicate check
+            instead of reading the whole file. An empty store is filled
+            from the file first.
     """
     try:
         # Get current date in ISO format (YYYY-MM-DD)
         scrape_date = datetime.now().date().isoformat()
         
-        # Read existing URLs if file exists
-        existing_urls = set()
-        if os.path.exists(filename):
-            with open(filename, 'r', newline='') as f:
-                reader = csv.reader(f)
-                next(reader, None)  # Skip header if exists
-                existing_urls = {row[0] for row in reader if row}  # Extract URLs from first column
-        
-        # Prepare new entries
-        new_entries = []
-        for url in auction_urls:
-            if url not in existing_urls:
-                new_entries.append([url, scrape_date])
+        if store is not None:
+            new_entries = [[url, scrape_date] for url in _new_urls_in_store(auction_urls, store, filename)]
+        else:
+            # Read existing URLs if file exists
+            existing_urls = set()
+            if os.path.exists(filename):
+                with open(filename, 'r', newline='') as f:
+                    reader = csv.reader(f)
+                    next(reader, None)  # Skip header if exists
+                    existing_urls = {row[0] for row in reader if row}  # Extract URLs from first column
+
+            # Prepare new entries
+            new_entries = []
+            for url in auction_urls:
+                if url not in existing_urls:
+                    new_entries.append([url, scrape_date])
         
         # Write to CSV (append mode)
         file_exists = os.path.exists(filename)
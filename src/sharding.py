@@ -0,0 +1,150 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+
+def parse_shard(spec:str) -> tuple:
+    """
+    Parses a shard spec like '2/8' (shard 2 of 8, counted from 0).
+
+    Returns:
+        tuple: (index, count)
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard index must be in 0..{count - 1}, got {spec!r}")
+    return index, count
+
+
+def _url_key(url:str) -> int:
+    # stable across processes and machines, unlike hash()
+    return int.from_bytes(hashlib.sha256(url.encode('utf-8')).digest()[:8], 'big')
+
+
+def jump_hash(key:int, buckets:int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach): maps key to one of `buckets`
+    shards so that going from N to N+1 shards moves only ~1/(N+1) of the
+    keys, all of them onto the new shard.
+    """
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_of(url:str, count:int) -> int:
+    """
+    The shard (0..count-1) that owns url.
+    """
+    return jump_hash(_url_key(url), count)
+
+
+def shard_urls(urls:list, index:int, count:int) -> list:
+    """
+    The slice of urls owned by shard `index` of `count`, in their original
+    order. Every worker computes its slice on its own, from the same list.
+    """
+    return [url for url in urls if shard_of(url, count) == index]
+
+
+def _better(new:dict, old:dict) -> bool:
+    # a record with a title beats one without; otherwise the later one wins
+    return bool(new.get('auction_title')) or not old.get('auction_title')
+
+
+def merge_outputs(paths:list, output_file:str) -> dict:
+    """
+    Combines per-shard JSON Lines outputs into one file with a single
+    record per auction_url. Where a URL appears more than once (a resumed
+    shard, or a URL moved between shards by a resize) the record with a
+    title wins, then the one read last.
+
+    Returns:
+        dict: Counts of records read, duplicates dropped and written
+    """
+    merged = {}
+    read = 0
+    for path in paths:
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                read += 1
+                url = record['auction_url']
+                if url not in merged or _better(record, merged[url]):
+                    merged[url] = record
+
+    tmp_path = output_file + '.tmp'
+    with open(tmp_path, 'w') as f:
+        for record in merged.values():
+            f.write(json.dumps(record) + '\n')
+    os.replace(tmp_path, output_file)
+    return {'read': read, 'duplicates': read - len(merged), 'written': len(merged)}
+
+
+def shard_output(output_file:str, index:int) -> str:
+    # rescraped_results.jsonl -> rescraped_results.shard-2.jsonl
+    root, extension = os.path.splitext(output_file)
+    return f"{root}.shard-{index}{extension}"
+
+
+def run_local(count:int, output_file:str, main_args:list) -> dict:
+    """
+    Runs `count` main.py processes side by side, one per shard, then merges
+    their outputs into output_file. Handy for trying a sharded run locally.
+    """
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    outputs = [shard_output(output_file, index) for index in range(count)]
+    processes = [
+        subprocess.Popen([sys.executable, main_py, *main_args,
+                          '--shard', f'{index}/{count}', '--output', outputs[index]])
+        for index in range(count)
+    ]
+    failed = [index for index, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        raise SystemExit(f"shard(s) {failed} failed; rerun them with --resume before merging")
+    return merge_outputs(outputs, output_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split URL lists into shards and merge shard outputs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    split = commands.add_parser("split", help="print the URLs of one shard")
+    split.add_argument("urls", help="master file with one auction URL per line")
+    split.add_argument("--shard", required=True, help="i/N, counted from 0")
+
+    merge = commands.add_parser("merge", help="merge shard outputs into one deduplicated JSON Lines file")
+    merge.add_argument("inputs", nargs="+", help="per-shard JSON Lines files")
+    merge.add_argument("-o", "--output", required=True)
+    merge.add_argument("--upload-source", help="also upload the merged file to S3 under this URL-file partition")
+
+    local = commands.add_parser("local", help="run N main.py processes, one per shard, then merge")
+    local.add_argument("--shards", type=int, required=True)
+    local.add_argument("-o", "--output", default="rescraped_results.jsonl")
+    local.add_argument("main_args", nargs=argparse.REMAINDER, help="passed on to main.py after --")
+
+    args = parser.parse_args()
+    if args.command == "split":
+        index, count = parse_shard(args.shard)
+        with open(args.urls, "r") as file:
+            urls = [url.strip() for url in file if url.strip()]
+        print("\n".join(shard_urls(urls, index, count)))
+    elif args.command == "merge":
+        print(json.dumps(merge_outputs(args.inputs, args.output)))
+        if args.upload_source:
+            import upload
+            upload.upload_file_to_s3(args.output, f"{upload.partition_prefix(args.upload_source)}/merged.jsonl")
+    else:
+        main_args = args.main_args[1:] if args.main_args[:1] == ["--"] else args.main_args
+        print(json.dumps(run_local(args.shards, args.output, main_args)))
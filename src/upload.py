@@ -2,6 +2,13 @@ import boto3
 import time
 import json
 import os
+import io
+import gzip
+import threading
+from datetime import datetime, timezone
+
+from failures import backoff_delay
+from metrics import record_step
 
 bucket_name = os.getenv('AUCTIONS_BUCKET')
 
@@ -15,3 +22,139 @@ def upload_to_s3(auction_data):
 
     s3 = boto3.client("s3")
     s3.upload_file(output_file, bucket_name, f"{output_file}")
+
+
+def upload_file_to_s3(output_file, key=None):
+    # Upload an already written results file (e.g. the streamed JSON Lines output)
+    s3 = boto3.client("s3")
+    with record_step("upload_file"):
+        s3.upload_file(output_file, bucket_name, key or os.path.basename(output_file))
+
+
+def download_file_from_s3(key, output_file) -> bool:
+    # Fetch a file written by an earlier run; False if there is none yet
+    s3 = boto3.client("s3")
+    try:
+        with record_step("download_file"):
+            s3.download_file(bucket_name, key, output_file)
+    except s3.exceptions.ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+            return False
+        raise
+    return True
+
+
+def partition_prefix(source, run_date=None, prefix="rescraped"):
+    # e.g. rescraped/run_date=2025-06-05/source=rescrape_urls_part_5
+    run_date = run_date or datetime.now(timezone.utc).date().isoformat()
+    return f"{prefix}/run_date={run_date}/source={source}"
+
+
+class S3StreamUploader:
+    """
+    Uploads results while the scrape runs instead of in one go at the end.
+
+    Records are gzip-compressed in memory and rolled into a new part object
+    (part-<run>-00001.jsonl.gz, ...) under a partitioned prefix whenever the
+    compressed part reaches part_size bytes. Each part is a complete object,
+    so parts uploaded before a crash stay readable. A manifest.json listing
+    every part is rewritten after each upload, and the URLs in each uploaded
+    part are appended to uploaded_log so a resumed run can tell which
+    finished records still need uploading.
+
+    A part whose PUT fails is kept and retried, under the same key, with
+    backoff and again on every later roll-over; close() raises if parts
+    are still not uploaded after its own retries.
+    """
+
+    def __init__(self, key_prefix, part_size=8 * 1024 ** 2, bucket=None, s3=None, uploaded_log=None,
+                 max_attempts=3, retry_base_delay=1):
+        self.bucket = bucket or bucket_name
+        self.key_prefix = key_prefix
+        self.part_size = part_size
+        self.s3 = s3 or boto3.client("s3")
+        self.uploaded_log = uploaded_log
+        self.run_id = int(time.time())
+        self.parts = self._read_manifest().get("parts", [])
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.pending = []   # (key, body, urls) of finished parts not uploaded yet
+        self.lock = threading.Lock()
+        self._new_part()
+
+    def _read_manifest(self):
+        # keep the parts of earlier (e.g. interrupted) runs in the same partition
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=f"{self.key_prefix}/manifest.json")
+        except self.s3.exceptions.NoSuchKey:
+            return {}
+        return json.loads(response["Body"].read())
+
+    def _new_part(self):
+        self.buffer = io.BytesIO()
+        self.gzip = gzip.GzipFile(fileobj=self.buffer, mode="wb", compresslevel=6)
+        self.part_urls = []
+
+    def write(self, url, auction_data):
+        line = (json.dumps(auction_data) + "\n").encode("utf-8")
+        with self.lock:
+            self.gzip.write(line)
+            self.part_urls.append(url)
+            if self.buffer.tell() >= self.part_size:
+                self._upload_part()
+
+    def _upload_part(self, attempts=None):
+        if self.part_urls:
+            try:
+                self.gzip.close()
+                key = f"{self.key_prefix}/part-{self.run_id}-{len(self.parts) + len(self.pending) + 1:05d}.jsonl.gz"
+                self.pending.append((key, self.buffer.getvalue(), self.part_urls))
+            finally:
+                # whatever happens to the upload, later writes go to a fresh part
+                self._new_part()
+
+        while self.pending:
+            key, body, urls = self.pending[0]
+            self._put_part(key, body, attempts or self.max_attempts)
+            self.pending.pop(0)
+            self.parts.append({"key": key, "records": len(urls), "bytes": len(body)})
+
+            # only now are these records safely in S3
+            if self.uploaded_log:
+                with open(self.uploaded_log, "a") as f:
+                    f.writelines(url + "\n" for url in urls)
+            self._write_manifest()
+            print(f"⬆️ Uploaded {key} ({len(urls)} records, {len(body) / 1024:.0f} KB)")
+
+    def _put_part(self, key, body, attempts):
+        for attempt in range(1, attempts + 1):
+            try:
+                with record_step("upload_part"):
+                    self.s3.put_object(Bucket=self.bucket, Key=key, Body=body,
+                                       ContentType="application/x-ndjson", ContentEncoding="gzip")
+                return
+            except Exception as e:
+                if attempt == attempts:
+                    print(f"❌ Upload of {key} failed {attempts} times, keeping it for a later retry: {e}")
+                    raise
+                delay = backoff_delay(attempt, self.retry_base_delay, 30)
+                print(f"Upload of {key} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _write_manifest(self):
+        manifest = {
+            "prefix": self.key_prefix,
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "records": sum(part["records"] for part in self.parts),
+            "parts": self.parts,
+        }
+        self.s3.put_object(Bucket=self.bucket, Key=f"{self.key_prefix}/manifest.json",
+                           Body=json.dumps(manifest, indent=2).encode("utf-8"),
+                           ContentType="application/json")
+
+    def close(self):
+        with self.lock:
+            try:
+                self._upload_part(attempts=self.max_attempts + 2)
+            finally:
+                self.gzip.close()
@@ -0,0 +1,145 @@
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    first_seen TEXT NOT NULL,
+    last_scraped TEXT,
+    status TEXT NOT NULL DEFAULT 'new'
+);
+CREATE INDEX IF NOT EXISTS urls_last_scraped ON urls (last_scraped);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+class UrlStore:
+    """
+    SQLite-backed index of every auction URL seen, with the date it was first
+    listed, when it was last scraped and how that scrape went.
+
+    Membership checks and upserts hit the primary key index, so saving a
+    page of URLs costs the same whether the store holds a hundred URLs or a
+    million. `url in store` works, so a store can be passed anywhere a set of
+    known URLs is expected (e.g. extract_auction_urls(known_urls=store)).
+    """
+
+    def __init__(self, path:str = 'auction_urls.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def __contains__(self, url:str) -> bool:
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM urls WHERE url = ?', (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+
+    def add_urls(self, urls:list, first_seen:str = None) -> int:
+        """
+        Inserts URLs that are not stored yet; existing rows are left alone.
+
+        Returns:
+            int: Number of new URLs
+        """
+        first_seen = first_seen or datetime.now().date().isoformat()
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO urls (url, first_seen) VALUES (?, ?)',
+                ((url, first_seen) for url in urls),
+            )
+            return self.conn.total_changes - before
+
+    def mark_scraped(self, url:str, status:str = 'ok', scraped_at:str = None):
+        """
+        Records a scrape attempt, adding the URL if it was not stored yet.
+        """
+        scraped_at = scraped_at or _now()
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO urls (url, first_seen, last_scraped, status) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET last_scraped = excluded.last_scraped, status = excluded.status',
+                (url, scraped_at[:10], scraped_at, status),
+            )
+
+    def never_scraped(self, limit:int = None) -> list:
+        """
+        URLs that have never been scraped, oldest listing first.
+        """
+        return self._select('last_scraped IS NULL', (), 'first_seen', limit)
+
+    def stale(self, older_than_days:int = 30, limit:int = None) -> list:
+        """
+        URLs whose last scrape is older than older_than_days or failed,
+        least recently scraped first.
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat(timespec='seconds')
+        return self._select(
+            "last_scraped IS NOT NULL AND (last_scraped < ? OR status != 'ok')", (cutoff,), 'last_scraped', limit)
+
+    def failed(self, statuses:set = None, limit:int = None) -> list:
+        """
+        URLs whose last scrape ended with one of statuses (default: the
+        transient failures in failures.TRANSIENT), least recently scraped first.
+        """
+        if statuses is None:
+            from failures import TRANSIENT
+            statuses = TRANSIENT
+        statuses = sorted(statuses)
+        placeholders = ', '.join('?' * len(statuses))
+        return self._select(f'status IN ({placeholders})', tuple(statuses), 'last_scraped', limit)
+
+    def rows(self) -> list:
+        """
+        Every stored row as (url, first_seen, last_scraped, status).
+        """
+        with self.lock:
+            return self.conn.execute('SELECT url, first_seen, last_scraped, status FROM urls').fetchall()
+
+    def _select(self, where:str, params:tuple, order:str, limit:int) -> list:
+        query = f'SELECT url FROM urls WHERE {where} ORDER BY {order}'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+        with self.lock:
+            return [row[0] for row in self.conn.execute(query, params)]
+
+    def import_file(self, filename:str) -> int:
+        """
+        Loads an existing auction_urls.csv (url, scrape_date) or
+        auction_urls.txt into the store.
+
+        Returns:
+            int: Number of new URLs
+        """
+        if not os.path.exists(filename):
+            return 0
+
+        with open(filename, 'r', newline='') as f:
+            if filename.endswith('.csv'):
+                reader = csv.reader(f)
+                next(reader, None)  # Skip header
+                rows = [(row[0], row[1] if len(row) > 1 else datetime.now().date().isoformat())
+                        for row in reader if row]
+            else:
+                today = datetime.now().date().isoformat()
+                rows = [(line.strip(), today) for line in f if line.strip()]
+
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany('INSERT OR IGNORE INTO urls (url, first_seen) VALUES (?, ?)', rows)
+            return self.conn.total_changes - before
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,20 @@
+# Stand-ins for pipeline.parse_page. They live in their own module so the
+# spawned parse workers can import them by name.
+import os
+
+import pipeline
+
+
+def crash_once(html, url, parser=None):
+    # kills its worker process the first time it sees a 'crash' URL, like an OOM kill
+    marker = os.environ['CRASH_MARKER']
+    if 'crash' in url and not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return pipeline.parse_page(html, url, parser)
+
+
+def always_raises(html, url, parser=None):
+    if 'bad' in url:
+        raise ValueError('unparseable')
+    return pipeline.parse_page(html, url, parser)
@@ -0,0 +1,44 @@
+import pytest
+
+import api_fetch
+import bench_replay
+import records
+
+
+@pytest.fixture
+def api_server(monkeypatch):
+    fixtures = bench_replay.load_fixtures()
+    with bench_replay.ReplayServer(fixtures, bench_replay.load_api_fixtures()) as server:
+        monkeypatch.setattr(api_fetch, 'API_BASE', f'{server.base_url}/v2')
+        yield server, fixtures
+
+
+def test_api_matches_the_page(api_server):
+    server, _ = api_server
+    url = f'{server.base_url}/auctions/no_reserve_sold'
+    with api_fetch.make_session() as session:
+        auction_data = api_fetch.fetch_auction_data(session, url)
+
+    expected = dict(bench_replay.load_expected(['no_reserve_sold'])['no_reserve_sold'], auction_url=url)
+    assert auction_data == expected
+    assert auction_data['auction_stats']['reserve_status'] == 'No Reserve'
+
+    record = records.from_legacy(auction_data)
+    assert record.ended_at.date().isoformat() == '2024-05-03'
+    assert record.quick_facts.mileage == 48000
+
+
+def test_listing_urls(api_server):
+    server, _ = api_server
+    with api_fetch.make_session() as session:
+        urls = api_fetch.fetch_auction_urls(session)
+    assert urls == [
+        f'{api_fetch.SITE_BASE}/auctions/no_reserve_sold/2004-porsche-911-carrera-cabriolet',
+        f'{api_fetch.SITE_BASE}/auctions/many_bids/1999-bmw-m3-coupe',
+    ]
+
+
+def test_unrecorded_auction_is_unavailable(api_server):
+    server, _ = api_server
+    with api_fetch.make_session() as session, pytest.raises(api_fetch.ApiUnavailable):
+        api_fetch.fetch_auction_data(session, f'{server.base_url}/auctions/cancelled')
@@ -0,0 +1,27 @@
+import archive
+from conftest import BUCKET
+
+
+def test_archive_round_trip_through_s3(s3, tmp_path):
+    runner, reparser = str(tmp_path / 'runner'), str(tmp_path / 'reparser')
+    archive.save_page('https://carsandbids.com/auctions/a', '<html>a</html>', '2025-06-01T00:00:00+00:00', runner)
+    archive.save_page('https://carsandbids.com/auctions/b', '<html>a</html>', '2025-06-01T00:00:01+00:00', runner)
+
+    assert archive.upload_archive(runner, bucket=BUCKET, s3=s3) == 2
+    # nothing new since the last upload
+    assert archive.upload_archive(runner, bucket=BUCKET, s3=s3) == 0
+    archive.save_page('https://carsandbids.com/auctions/a', '<html>a2</html>', '2025-06-02T00:00:00+00:00', runner)
+    assert archive.upload_archive(runner, bucket=BUCKET, s3=s3) == 1
+
+    index_parts = s3.list_objects_v2(Bucket=BUCKET, Prefix='html_archive/index/')['KeyCount']
+    objects = s3.list_objects_v2(Bucket=BUCKET, Prefix='html_archive/objects/')['KeyCount']
+    assert (index_parts, objects) == (2, 2)
+
+    assert archive.download_archive(reparser, bucket=BUCKET, s3=s3) == 2
+    pages = {entry['url']: archive.load_page(entry, reparser) for entry in archive.read_index(reparser)}
+    assert pages == {'https://carsandbids.com/auctions/a': '<html>a2</html>',
+                     'https://carsandbids.com/auctions/b': '<html>a</html>'}
+    # downloading again adds nothing, and none of it is sent back
+    assert archive.download_archive(reparser, bucket=BUCKET, s3=s3) == 0
+    assert len(archive.read_index(reparser, latest_only=False)) == 3
+    assert archive.upload_archive(reparser, bucket=BUCKET, s3=s3) == 0
@@ -0,0 +1,45 @@
+import failures
+import scrape_auction
+
+
+RECAPTCHA_HEAD = (
+    '<html><head><title>2004 Porsche 911 Carrera Cabriolet auction - Cars &amp; Bids</title>'
+    '<script src="https://www.google.com/recaptcha/api.js?render=explicit"></script></head>'
+)
+
+
+def parsed_auction():
+    auction_data = scrape_auction.new_auction_data('https://carsandbids.com/auctions/abc/2004-porsche-911')
+    auction_data['auction_title'] = '2004 Porsche 911 Carrera Cabriolet'
+    auction_data['auction_stats'].update(reserve_status='No Reserve', seller_username='seller', auction_date='6/1/25')
+    auction_data['auction_quick_facts']['Make'] = 'Porsche'
+    return auction_data
+
+
+def test_real_page_loading_recaptcha_is_not_blocked():
+    html = RECAPTCHA_HEAD + '<body><h1>2004 Porsche 911</h1></body></html>'
+    assert not failures.looks_blocked(html)
+    assert failures.classify(parsed_auction(), html) == failures.OK
+
+
+def test_parsed_title_wins_over_block_markers():
+    html = '<html><head><title>Just a moment...</title></head><body></body></html>'
+    assert failures.classify(parsed_auction(), html) == failures.OK
+
+
+def test_challenge_pages_are_blocked():
+    empty = scrape_auction.new_auction_data('https://carsandbids.com/auctions/abc')
+    pages = [
+        '<html><head><title>Just a moment...</title></head><body></body></html>',
+        '<html><head><title>Access denied | carsandbids.com used Cloudflare</title></head></html>',
+        '<html><head><title>Verify</title><script src="/cdn-cgi/challenge-platform/h/b/orchestrate"></script></head></html>',
+    ]
+    for html in pages:
+        assert failures.classify(empty, html) == failures.BLOCKED
+
+
+def test_empty_pages_are_timeout_or_missing_title():
+    empty = scrape_auction.new_auction_data('https://carsandbids.com/auctions/abc')
+    html = '<html><head><title>Cars &amp; Bids</title></head><body>Not found</body></html>'
+    assert failures.classify(empty, html) == failures.MISSING_TITLE
+    assert failures.classify(empty, html, timed_out=True) == failures.TIMEOUT
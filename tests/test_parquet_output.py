@@ -0,0 +1,24 @@
+import pytest
+
+import bench_replay
+import parquet_output
+import records
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def test_schema_matches_to_row_and_round_trips(tmp_path):
+    auction_data = dict(bench_replay.load_expected(['no_reserve_sold'])['no_reserve_sold'],
+                        auction_url='https://carsandbids.com/auctions/no_reserve_sold')
+    row = records.to_row(records.from_legacy(auction_data))
+    assert list(row) == parquet_output.auction_schema().names
+
+    path = str(tmp_path / 'results.parquet')
+    writer = parquet_output.AuctionParquetWriter(path)
+    writer.write(auction_data)
+    writer.close()
+
+    table = pq.read_table(path)
+    assert table.column('reserve_status').to_pylist() == ['No Reserve']
+    assert table.column('max_increment').to_pylist() == [6000]
+    assert table.column('mileage_value').to_pylist() == [48000]
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+import bench_replay
+import metrics
+import parse_html
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'fixtures')
+SECTIONS = ['parse:document', 'parse:header', 'parse:stats', 'parse:quick_facts', 'parse:details', 'parse:bids']
+
+
+@pytest.mark.parametrize('parser', sorted(parse_html.PARSER_BACKENDS))
+def test_extraction_sections_are_timed(parser):
+    with open(os.path.join(FIXTURES, 'many_bids.html')) as f:
+        html = f.read()
+    metrics.step_latencies.clear()
+
+    auction_data = parse_html.parse_auction_html(html, 'https://carsandbids.com/auctions/many_bids', parser)
+
+    assert len(auction_data['auction_stats']['bid_history']) == 350
+    for step in SECTIONS + ['parse:html', 'parse:map']:
+        assert len(metrics.step_latencies[step]) == 1, step
+
+
+@pytest.mark.parametrize('parser', sorted(parse_html.PARSER_BACKENDS))
+@pytest.mark.parametrize('name, reserve_status', [('no_reserve_sold', 'No Reserve'), ('many_bids', 'Reserve')])
+def test_reserve_status(parser, name, reserve_status):
+    with open(os.path.join(FIXTURES, f'{name}.html')) as f:
+        html = f.read()
+
+    auction_data = parse_html.parse_auction_html(html, f'https://carsandbids.com/auctions/{name}', parser)
+
+    assert auction_data['auction_stats']['reserve_status'] == reserve_status
+
+
+@pytest.mark.parametrize('parser', sorted(parse_html.PARSER_BACKENDS))
+@pytest.mark.parametrize('name', ['cancelled', 'many_bids', 'missing_sections', 'no_reserve_sold'])
+def test_fixture_matches_expected(parser, name):
+    with open(os.path.join(FIXTURES, f'{name}.html')) as f:
+        html = f.read()
+
+    auction_data = parse_html.parse_auction_html(html, name, parser)
+
+    auction_data.pop('auction_url')
+    assert auction_data == bench_replay.load_expected([name])[name]
@@ -0,0 +1,135 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+import failures
+import pipeline
+import pipeline_helpers
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'fixtures', 'no_reserve_sold.html')
+
+
+class FakeSession:
+    recycles = {}
+    peak_memory_mb = 0.0
+
+
+@pytest.fixture
+def fake_browser(monkeypatch):
+    with open(FIXTURE) as f:
+        html = f.read()
+    monkeypatch.setattr(pipeline.BrowserFetcher, '__init__', lambda self, *args, **kwargs: setattr(self, 'session', FakeSession()))
+    monkeypatch.setattr(pipeline.BrowserFetcher, 'fetch', lambda self, url: (html, False))
+    monkeypatch.setattr(pipeline.BrowserFetcher, 'close', lambda self: None)
+
+
+class Uploads:
+    def __init__(self):
+        self.urls = []
+
+    def write(self, url, auction_data):
+        self.urls.append(url)
+
+
+def run(urls, **kwargs):
+    results, uploads = {}, Uploads()
+    scrape = pipeline.ScrapePipeline(workers=2, rate=1000, parse_workers=2, archive_pages=False,
+                                     retry_base_delay=0.01, uploader=uploads,
+                                     on_result=lambda url, data, status: results.__setitem__(url, status), **kwargs)
+    pipeline.asyncio.run(scrape.run(urls))
+    return scrape, results, uploads
+
+
+def test_dead_parse_worker_is_replaced_and_the_page_retried(fake_browser, monkeypatch, tmp_path):
+    monkeypatch.setenv('CRASH_MARKER', str(tmp_path / 'crashed'))
+    monkeypatch.setattr(pipeline, 'parse_page', pipeline_helpers.crash_once)
+    urls = [f'https://carsandbids.com/auctions/ok{i}' for i in range(4)] + ['https://carsandbids.com/auctions/crash']
+
+    scrape, results, uploads = run(urls)
+
+    assert (tmp_path / 'crashed').exists()
+    assert scrape.retries[failures.PARSE_ERROR] >= 1
+    # pages lost with the dead worker are refetched; none end up as empty records
+    assert set(results) == set(urls)
+    assert set(results.values()) == {failures.OK}
+    assert sorted(uploads.urls) == sorted(urls)
+
+
+def test_parse_errors_are_not_uploaded(fake_browser, monkeypatch):
+    monkeypatch.setattr(pipeline, 'parse_page', pipeline_helpers.always_raises)
+    urls = ['https://carsandbids.com/auctions/ok', 'https://carsandbids.com/auctions/bad']
+
+    scrape, results, uploads = run(urls)
+
+    assert results == {urls[0]: failures.OK, urls[1]: failures.PARSE_ERROR}
+    assert failures.PARSE_ERROR in failures.TRANSIENT
+    assert uploads.urls == [urls[0]]
+
+
+class DeadDriver:
+    # chromedriver killed under it: Selenium lets urllib3's error through
+    def get(self, url):
+        raise MaxRetryError(None, url, NewConnectionError(None, 'Connection refused'))
+
+
+class LiveDriver:
+    page_source = '<html><head><title>ok</title></head></html>'
+
+    def get(self, url):
+        pass
+
+
+class FakeManagedDriver:
+    def __init__(self, *args):
+        self.drivers = [DeadDriver(), LiveDriver()]
+        self.discarded = 0
+
+    def get(self):
+        return self.drivers[0]
+
+    def discard(self):
+        self.discarded += 1
+        self.drivers.pop(0)
+
+    def page_done(self):
+        pass
+
+
+class NoLimit:
+    def acquire(self, url):
+        pass
+
+
+def test_driver_lost_to_a_connection_error_is_relaunched(monkeypatch):
+    monkeypatch.setattr(pipeline.driver_setup, 'ManagedDriver', FakeManagedDriver)
+    monkeypatch.setattr(pipeline.driver_setup, 'close_promo_bar', lambda driver: None)
+    monkeypatch.setattr(pipeline.scrape_auction, 'show_bid_history', lambda driver: None)
+    fetcher = pipeline.BrowserFetcher(NoLimit())
+
+    html, timed_out = fetcher.fetch('https://carsandbids.com/auctions/ok')
+
+    assert fetcher.session.discarded == 1
+    assert html == LiveDriver.page_source
+    assert not timed_out
+
+
+def test_api_is_given_up_exactly_once_across_threads():
+    api_failures = pipeline.ApiFailures(limit=5)
+    barrier = threading.Barrier(8)
+
+    def fail():
+        barrier.wait()
+        return [api_failures.failure() for _ in range(50)]
+
+    with ThreadPoolExecutor(8) as executor:
+        results = [flag for flags in executor.map(lambda _: fail(), range(8)) for flag in flags]
+
+    assert results.count(True) == 1
+    assert not api_failures.available()
+    # a late success does not bring the API back
+    api_failures.success()
+    assert not api_failures.available()
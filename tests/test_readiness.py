@@ -0,0 +1,37 @@
+import time
+
+import readiness
+
+
+class FilterPage:
+    """
+    Fake driver for a comment thread whose bid filter answers after `delay`
+    seconds: 3 comments and 2 bids before, 40 bids after.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.clicked_at = None
+
+    def execute_script(self, script, *args):
+        if 'click()' in script:
+            self.clicked_at = time.monotonic()
+            return None
+        loaded = self.clicked_at is not None and time.monotonic() - self.clicked_at >= self.delay
+        if 'querySelector(arguments[0]) !== null' in script:
+            return False
+        if script == readiness.THREAD_SIGNATURE_JS:
+            return [40, 40] if loaded else [5, 2]
+        return 40 if loaded else 2
+
+
+def test_waits_for_a_slow_filter_instead_of_the_stale_count():
+    page = FilterPage(delay=1.2)
+    assert readiness.click_and_wait_for_bids(page, button=None, interval=0.05) == 40
+
+
+def test_falls_back_after_change_timeout():
+    page = FilterPage(delay=60)
+    started = time.monotonic()
+    assert readiness.click_and_wait_for_bids(page, button=None, change_timeout=0.3, interval=0.05) == 2
+    assert time.monotonic() - started < 1
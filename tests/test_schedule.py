@@ -0,0 +1,37 @@
+from datetime import date
+
+import schedule
+import url_store
+
+
+def test_queue_round_trip(tmp_path):
+    filename = str(tmp_path / 'results.jsonl.queued.txt')
+    assert schedule.read_queue(filename) == []
+
+    schedule.write_queue(['https://carsandbids.com/auctions/b', 'https://carsandbids.com/auctions/c'], filename)
+
+    assert schedule.read_queue(filename) == ['https://carsandbids.com/auctions/b', 'https://carsandbids.com/auctions/c']
+
+
+def test_queued_urls_go_first():
+    urls = ['a', 'b', 'c', 'd']
+
+    assert schedule.queued_first(urls, ['d', 'x', 'c', 'd']) == ['d', 'c', 'a', 'b']
+
+
+def test_listing_date_wins_over_the_store_first_seen(tmp_path):
+    store = url_store.UrlStore(str(tmp_path / 'auction_urls.db'))
+    today = date(2025, 6, 10)
+    # never listed through the store, so mark_scraped records the scrape date as first_seen
+    store.mark_scraped('https://carsandbids.com/auctions/old', 'ok', '2025-06-09T12:00:00+00:00')
+    store.mark_scraped('https://carsandbids.com/auctions/new', 'ok', '2025-06-09T12:00:00+00:00')
+    listing_dates = {'https://carsandbids.com/auctions/old': '2022-01-01',
+                     'https://carsandbids.com/auctions/new': '2025-06-08'}
+
+    rows = schedule.url_rows(list(listing_dates), store, listing_dates)
+    store.close()
+
+    assert schedule.prioritise(rows, settle_days=7, stale_days=30, today=today) == [
+        (schedule.SETTLING, 'https://carsandbids.com/auctions/new'),
+        (schedule.FRESH, 'https://carsandbids.com/auctions/old'),
+    ]
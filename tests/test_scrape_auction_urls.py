@@ -0,0 +1,29 @@
+import scrape_auction_urls
+import url_store
+
+
+def test_empty_store_is_seeded_from_the_csv(tmp_path):
+    filename = str(tmp_path / 'auction_urls.csv')
+    scrape_auction_urls.save_auction_urls_to_csv(['https://carsandbids.com/auctions/a'], filename)
+
+    store = url_store.UrlStore(str(tmp_path / 'auction_urls.db'))
+    scrape_auction_urls.save_auction_urls_to_csv(
+        ['https://carsandbids.com/auctions/a', 'https://carsandbids.com/auctions/b'], filename, store=store)
+    store.close()
+
+    with open(filename) as f:
+        assert [line.split(',')[0] for line in f.read().splitlines()[1:]] == [
+            'https://carsandbids.com/auctions/a', 'https://carsandbids.com/auctions/b']
+
+
+def test_empty_store_is_seeded_from_the_text_file(tmp_path):
+    filename = str(tmp_path / 'auction_urls.txt')
+    scrape_auction_urls.save_auction_urls_locally(['https://carsandbids.com/auctions/a'], filename)
+
+    store = url_store.UrlStore(str(tmp_path / 'auction_urls.db'))
+    scrape_auction_urls.save_auction_urls_locally(['https://carsandbids.com/auctions/a'], filename, store=store)
+    assert len(store) == 1
+    store.close()
+
+    with open(filename) as f:
+        assert f.read().splitlines() == ['https://carsandbids.com/auctions/a']
@@ -0,0 +1,70 @@
+import gzip
+import json
+
+import pytest
+
+import upload
+from conftest import BUCKET
+
+
+def fail_part_puts(monkeypatch, s3, failures):
+    # put_object raises for the next `failures` part uploads; manifests go through
+    real_put = s3.put_object
+    calls = {"failed": 0}
+
+    def put_object(**kwargs):
+        if "/part-" in kwargs["Key"] and calls["failed"] < failures:
+            calls["failed"] += 1
+            raise ConnectionError("throttled")
+        return real_put(**kwargs)
+
+    monkeypatch.setattr(s3, "put_object", put_object)
+    monkeypatch.setattr(upload.time, "sleep", lambda seconds: None)
+    return calls
+
+
+def read_part(s3, key):
+    body = s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+    return [json.loads(line)["auction_url"] for line in gzip.decompress(body).splitlines()]
+
+
+def test_failed_put_is_retried_and_later_writes_still_work(s3, monkeypatch, tmp_path):
+    uploaded_log = tmp_path / "uploaded"
+    uploader = upload.S3StreamUploader("rescraped/test", part_size=1, bucket=BUCKET, s3=s3,
+                                       uploaded_log=str(uploaded_log), max_attempts=1)
+    fail_part_puts(monkeypatch, s3, failures=1)
+
+    with pytest.raises(ConnectionError):
+        uploader.write("u1", {"auction_url": "u1"})
+    assert not uploaded_log.exists()
+
+    # the stream is usable again and the failed part goes up first
+    uploader.write("u2", {"auction_url": "u2"})
+    uploader.close()
+
+    keys = [part["key"] for part in uploader.parts]
+    assert [read_part(s3, key) for key in keys] == [["u1"], ["u2"]]
+    assert uploaded_log.read_text().split() == ["u1", "u2"]
+    manifest = json.loads(s3.get_object(Bucket=BUCKET, Key="rescraped/test/manifest.json")["Body"].read())
+    assert manifest["records"] == 2
+
+
+def test_put_retries_with_backoff_before_giving_up(s3, monkeypatch):
+    uploader = upload.S3StreamUploader("rescraped/test", bucket=BUCKET, s3=s3, max_attempts=3)
+    calls = fail_part_puts(monkeypatch, s3, failures=2)
+
+    uploader.write("u1", {"auction_url": "u1"})
+    uploader.close()
+
+    assert calls["failed"] == 2
+    assert read_part(s3, uploader.parts[0]["key"]) == ["u1"]
+
+
+def test_close_raises_when_parts_stay_unuploaded(s3, monkeypatch):
+    uploader = upload.S3StreamUploader("rescraped/test", bucket=BUCKET, s3=s3, max_attempts=1)
+    fail_part_puts(monkeypatch, s3, failures=100)
+
+    uploader.write("u1", {"auction_url": "u1"})
+    with pytest.raises(ConnectionError):
+        uploader.close()
+    assert uploader.pending and not uploader.parts